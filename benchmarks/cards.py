@@ -0,0 +1,45 @@
+"""Cards used in the benchmarks."""
+
+import msteams as ms
+
+
+def small_alert(host="db1", value="98 %"):
+    """A typical alert card with a few facts and a link."""
+    card = ms.MessageCard(
+        title="{} disk almost full".format(host), theme_color="FF0000"
+    )
+    card.add_section(
+        ms.CardSection(
+            activity_title="Monitoring",
+            facts=[ms.Fact("Host", host), ms.Fact("Usage", value)],
+        )
+    )
+    card.add_potential_action(
+        ms.OpenUriAction("Dashboard", {"default": "https://example.com/" + host})
+    )
+    return card
+
+
+def large_facts(n=1000):
+    """A card with one section of n facts, added one at a time."""
+    section = ms.CardSection(title="Metrics")
+    for i in range(n):
+        section.add_fact("metric{}".format(i), str(i))
+    return ms.MessageCard(title="Report", sections=[section])
+
+
+def nested_actions(n=20):
+    """A card with ActionCards holding inputs with many choices."""
+    actions = []
+    for i in range(n):
+        choices = [ms.Choice("Choice {}".format(j), str(j)) for j in range(20)]
+        inputs = [
+            ms.TextInput(id="comment", title="Comment", is_multiline=True),
+            ms.DateInput(id="due", title="Due", include_time=True),
+            ms.MultipleChoiceInput(id="list", choices=choices, style="expanded"),
+        ]
+        post = ms.HttpPostAction("Save", "https://example.com/save", body="{}")
+        actions.append(
+            ms.ActionCard(name="Action {}".format(i), inputs=inputs, actions=[post])
+        )
+    return ms.MessageCard(title="Actions", potential_action=actions)
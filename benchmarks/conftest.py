@@ -0,0 +1,104 @@
+"""Fixtures measuring the time and peak memory of the benchmarks.
+
+Baselines are recorded per machine and interpreter, and are not committed.
+Record one with ``tox -e bench-baseline``, and compare against it with
+``tox -e bench``, which fails if the mean time or the peak memory of a
+benchmark regressed by more than the thresholds. Record the baseline again
+after intended changes in performance.
+"""
+
+import pytest
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+# Rounds for benchmarks that build new objects for every round
+FRESH_ROUNDS = 30
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--memory-compare-fail",
+        type=float,
+        default=None,
+        metavar="PERCENT",
+        help="Fail benchmarks whose peak memory is more than PERCENT above "
+        "the one in the benchmark compared against.",
+    )
+
+
+def pytest_sessionstart(session):
+    bs = getattr(session.config, "_benchmarksession", None)
+    if bs is not None and bs.compare and not bs.compared_mapping:
+        raise pytest.UsageError(
+            "No benchmark baseline to compare against in {} for this machine "
+            "and interpreter. Record one with tox -e bench-baseline.".format(bs.storage)
+        )
+
+
+def _baseline_peak(config, fullname):
+    """Return the peak memory of the benchmark compared against, if any."""
+    bs = getattr(config, "_benchmarksession", None)
+    for benchmarks in (bs.compared_mapping if bs is not None else {}).values():
+        baseline = benchmarks.get(fullname)
+        if baseline is not None:
+            return baseline.get("extra_info", {}).get("peak_memory")
+    return None
+
+
+def _record_peak_memory(request, benchmark, func, *args, **kwargs):
+    """Run func once, and record its peak memory use in extra_info.
+
+    Fails if the peak memory regressed by more than --memory-compare-fail.
+    """
+    if tracemalloc is None:
+        return
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info["peak_memory"] = peak
+
+    threshold = request.config.getoption("memory_compare_fail")
+    baseline = _baseline_peak(request.config, benchmark.fullname)
+    if threshold is not None and baseline:
+        limit = baseline * (1 + threshold / 100.0)
+        if peak > limit:
+            pytest.fail(
+                "Peak memory {} bytes is more than {}% above the baseline "
+                "{} bytes".format(peak, threshold, baseline),
+                pytrace=False,
+            )
+
+
+@pytest.fixture
+def measure(request, benchmark):
+    """Benchmark a function, and record its peak memory use in extra_info."""
+
+    def run(func, *args, **kwargs):
+        _record_peak_memory(request, benchmark, func, *args, **kwargs)
+        return benchmark(func, *args, **kwargs)
+
+    return run
+
+
+@pytest.fixture
+def measure_fresh(request, benchmark):
+    """Benchmark func(obj) with a new obj from make in every round.
+
+    Nothing is cached in the new objects, so the whole tree is serialized in
+    every round. Only func is timed. Peak memory is recorded like by measure.
+    """
+
+    def run(func, make, rounds=FRESH_ROUNDS):
+        _record_peak_memory(request, benchmark, func, make())
+        return benchmark.pedantic(
+            func, setup=lambda: ((make(),), {}), rounds=rounds, warmup_rounds=1
+        )
+
+    return run
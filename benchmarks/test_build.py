@@ -0,0 +1,35 @@
+import msteams as ms
+
+from cards import large_facts, nested_actions, small_alert
+
+
+def test_small_alert(measure):
+    measure(small_alert)
+
+
+def test_large_facts(measure):
+    measure(large_facts)
+
+
+def test_large_fact_columns(measure):
+    names = ["metric{}".format(i) for i in range(1000)]
+    values = [str(i) for i in range(1000)]
+
+    def build():
+        section = ms.CardSection(title="Metrics")
+        section.set_facts_from_columns(names, values)
+        return ms.MessageCard(title="Report", sections=[section])
+
+    measure(build)
+
+
+def test_nested_actions(measure):
+    measure(nested_actions)
+
+
+def test_lazy_validation(measure):
+    def build():
+        with ms.lazy_validation():
+            return large_facts().to_bytes()
+
+    measure(build)
@@ -0,0 +1,17 @@
+import msteams as ms
+
+from cards import small_alert
+
+
+def test_send(measure, server):
+    card = small_alert()
+    url = server.url()
+    with ms.Connector() as connector:
+        measure(card.send, url, connector=connector)
+
+
+def test_send_many(measure, server):
+    card = small_alert()
+    urls = [server.url("/webhook{}".format(i)) for i in range(20)]
+    with ms.Connector() as connector:
+        measure(ms.send_many, card, urls, connector=connector)
@@ -0,0 +1,40 @@
+import msteams as ms
+
+from cards import large_facts, nested_actions, small_alert
+
+
+def test_small_alert_bytes(measure):
+    measure(lambda: small_alert().to_bytes())
+
+
+def test_large_facts_bytes(measure_fresh):
+    measure_fresh(ms.MessageCard.to_bytes, large_facts)
+
+
+def test_large_facts_cached(measure):
+    card = large_facts()
+    measure(card.to_bytes)
+
+
+def test_nested_actions_bytes(measure_fresh):
+    measure_fresh(ms.MessageCard.to_bytes, nested_actions)
+
+
+def test_indented_json(measure):
+    card = nested_actions()
+    measure(card.get_payload, fmt="json", indent=2)
+
+
+def test_python_payload(measure):
+    card = nested_actions()
+    measure(card.get_payload)
+
+
+def test_from_json(measure):
+    data = nested_actions().to_bytes()
+    measure(ms.MessageCard.from_json, data)
+
+
+def test_template_render(measure):
+    template = ms.CardTemplate(small_alert("{host}", "{value}"))
+    measure(template.render_bytes, host="db1", value="98 %")
@@ -0,0 +1,23 @@
+import sys
+
+import pytest
+
+pytest_plugins = ["msteams.testing"]
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore += ["msteams/aio.py", "tests/test_aio.py"]
+
+
+@pytest.fixture
+def server():
+    """Fake connector with fixed faults for some paths, accepting any body."""
+    from msteams.testing import FakeTeamsServer
+
+    with FakeTeamsServer(validate=False) as httpd:
+        httpd.add_rule("/bad", status=400)
+        httpd.add_rule("/slow", latency=0.5)
+        httpd.add_rule("/drop", close=True)
+        httpd.add_rule("/throttle", status=429, retry_after=0, times=1)
+        httpd.add_rule("/flaky", status=503, times=1)
+        yield httpd
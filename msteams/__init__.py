@@ -2,18 +2,34 @@
 
 """Wrapper objects for building and sending Message Cards."""
 
+import hashlib
+import io
 import json
+import threading
+import weakref
 from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
 
+# Defined before the submodules are imported, since they use them as well.
 try:
-    # Python 3
-    from urllib import request
-except ImportError:
-    # Fallback to python 2
-    import urllib2 as request
+    # Python 2
+    _string_types = basestring
+except NameError:
+    _string_types = str
+
+_encode_str = getattr(json.encoder, "c_encode_basestring_ascii", None)
+if _encode_str is None:
+    _encode_str = json.encoder.encode_basestring_ascii
+
+from .dispatch import Dispatcher
+from .template import CardTemplate
+from .transport import Connector, SendResult, default_connector, send_many
 
 __version__ = "0.1.0"
 
+# Largest payload accepted by Teams webhook connectors, in bytes.
+MAX_PAYLOAD_SIZE = 28000
+
 Field = namedtuple("Specification", ("expected_type", "allow_iter", "valid_values"))
 Field.__new__.__defaults__ = (None, False, None)
 
@@ -40,80 +56,569 @@ def _viewitems(obj):
     return func()
 
 
+_ITER_TYPES = frozenset((tuple, list))
+
+
 def _is_iter(val):
     """Check if value is of accepted iterable type."""
-    return type(val) in [tuple, list]
+    return type(val) in _ITER_TYPES
+
+
+def _encode_value(value):
+    """Encode a non CardObject value to compact json.
+
+    >>> print(_encode_value([True, 1, None]))
+    [true, 1, null]
+    """
+    if isinstance(value, _string_types):
+        return _encode_str(value)
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is int:
+        return int.__repr__(value)
+    return json.dumps(value, separators=(", ", ": "))
+
+
+_isascii = getattr(str, "isascii", None)
+
+
+def _value_size(value):
+    """Estimate the size of a non CardObject value encoded as json.
+
+    ASCII strings are measured without escaping them, so quotes, backslashes
+    and control characters are not counted.
+
+    >>> _value_size("abc"), _value_size(u"\xe5"), _value_size([1, True])
+    (5, 8, 9)
+    """
+    if type(value) is str:
+        if _isascii is not None and _isascii(value):
+            return len(value) + 2
+        return len(_encode_str(value))
+    if type(value) in _ITER_TYPES:
+        return sum([_value_size(v) for v in value]) + 2 * max(len(value), 1)
+    return len(_encode_value(value))
+
+
+# How a field value is turned into its payload representation.
+_SCALAR, _LIST, _OBJECT, _OBJECT_LIST = range(4)
+
+
+def _compile_plan(fields):
+    """Compile a serialization plan for a field specification.
+
+    The plan is a tuple of (field name, payload key, json key prefix, kind)
+    in field order.
+
+    >>> _compile_plan(OrderedDict((("theme_color", Field(str, False)),)))
+    (('theme_color', 'themeColor', '"themeColor": ', 0),)
+    """
+    plan = []
+    for name, spec in _viewitems(fields):
+        is_object = isinstance(spec.expected_type, type) and issubclass(
+            spec.expected_type, CardObject
+        )
+        if spec.allow_iter:
+            kind = _OBJECT_LIST if is_object else _LIST
+        else:
+            kind = _OBJECT if is_object else _SCALAR
+        key = _snake_to_dromedary_case(name)
+        plan.append((name, key, _encode_str(key) + ": ", kind))
+    return tuple(plan)
+
+
+_local = threading.local()
+
+# Validation modes, see unchecked and lazy_validation.
+_UNCHECKED = "unchecked"
+_LAZY = "lazy"
+
+# Marks the _cache of an object whose fields have not been checked yet.
+_PENDING = object()
+
+
+@contextmanager
+def _validation_mode(mode):
+    """Set the validation mode of the current thread for the block."""
+    previous = getattr(_local, "mode", None)
+    _local.mode = mode
+    try:
+        yield
+    finally:
+        _local.mode = previous
+
+
+def unchecked():
+    """Skip value checks for card objects built or changed in the block.
+
+    Values are stored without being checked. Values that are converted when
+    set, like a dict of facts, are converted as usual, and single values for
+    list fields are wrapped in a list. Use CardObject.validate to check the
+    objects afterwards. Applies to the current thread only.
+
+    >>> with unchecked():
+    ...     section = CardSection(title="Title", facts=[Fact("name", "value")])
+    ...     section.add_fact("other", 1)
+    >>> section.validate()  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+        ...
+    TypeError: facts[1].value: Got argument of wrong type ...
+    """
+    return _validation_mode(_UNCHECKED)
+
+
+def lazy_validation():
+    """Defer value checks for card objects built or changed in the block.
+
+    Values are stored as given, like in unchecked mode, and each object
+    checks its fields once, the next time it is serialized or sent. Errors
+    are raised from there, with the path to the offending field. Applies to
+    the current thread only.
+
+    >>> with lazy_validation():
+    ...     card = MessageCard(title="Title")
+    ...     card.set_sections([CardSection(facts={"name": 1})])
+    >>> card.to_bytes()  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+        ...
+    TypeError: sections[0].facts[0].value: Got argument of wrong type ...
+    """
+    return _validation_mode(_LAZY)
+
+
+_Check = namedtuple(
+    "_Check", ("expected_type", "allow_iter", "valid_set", "valid_values", "converters")
+)
+
+
+# Class methods named like converters that create objects from payloads.
+_LOADERS = frozenset(("from_payload", "from_json"))
+
 
+def _compile_checks(fields):
+    """Compile the value checks for a field specification.
 
-class CardObject(object):
-    """Base class for card objects."""
+    Returns a dict mapping field name to a _Check with the valid values as a
+    set and the converters of the expected type keyed on the name of the
+    type they convert from.
+
+    >>> checks = _compile_checks(OrderedDict((("facts", Field(Fact, True)),)))
+    >>> sorted(checks["facts"].converters)
+    ['OrderedDict', 'dict']
+    """
+    checks = {}
+    for name, spec in _viewitems(fields):
+        exp_type = spec.expected_type
+        if exp_type is str:
+            # Also accept unicode on python 2, like the json module returns
+            exp_type = _string_types
+        converters = {}
+        for attr in dir(exp_type):
+            if attr.startswith("from_") and attr not in _LOADERS:
+                converters[attr[len("from_") :]] = getattr(exp_type, attr)
+        valid_set = None
+        if spec.valid_values is not None:
+            valid_set = frozenset(spec.valid_values)
+        checks[name] = _Check(
+            exp_type, spec.allow_iter, valid_set, spec.valid_values, converters
+        )
+    return checks
+
+
+class _ReadOnlyDict(OrderedDict):
+    """OrderedDict that can not be changed once created."""
+
+    _error = "Can not be changed"
+
+    def __init__(self, items=()):
+        super(_ReadOnlyDict, self).__init__()
+        for key, value in _viewitems(OrderedDict(items)):
+            OrderedDict.__setitem__(self, key, value)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(self._error)
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (self.__class__, (list(_viewitems(self)),))
+
+
+class _FieldTable(_ReadOnlyDict):
+    """Read only field specification of a card object class."""
+
+    _error = "Field specifications can not be changed"
+
+
+class _StaticPayload(_ReadOnlyDict):
+    """Read only static payload entries of a card object class."""
+
+    _error = "Static payload entries are set in _payload of the class"
+
+
+# Card object classes by their @type, for creating objects from payloads.
+_card_types = {}
+
+
+class _CardObjectMeta(type):
+    """Metaclass compiling the field tables of card object classes.
+
+    The _fields of a class are merged with the fields of its bases, so
+    subclasses only declare the fields they add, and the serialization plan
+    and value checks are compiled once, when the class is created.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super(_CardObjectMeta, cls).__init__(name, bases, namespace)
+        fields = OrderedDict()
+        for base in reversed(bases):
+            fields.update(getattr(base, "_fields", ()))
+        fields.update(namespace.get("_fields", ()))
+        cls._fields = _FieldTable(fields)
+        cls._plan = _compile_plan(fields)
+        cls._checks = _compile_checks(fields)
+        cls._field_keys = dict((key, (name, kind)) for name, key, _, kind in cls._plan)
+        if "_payload" in namespace:
+            # Shared by all instances, and by subclasses without their own
+            cls._payload = _StaticPayload(namespace["_payload"])
+            type_name = cls._payload.get("@type")
+            if type_name is not None:
+                _card_types[type_name] = cls
+
+
+def _with_metaclass(meta, *bases):
+    """Return a base class that makes subclasses use meta, for python 2 and 3."""
+    return meta("_CardObjectBase", bases, {"__slots__": ()})
+
+
+class CardObject(_with_metaclass(_CardObjectMeta, object)):
+    """Base class for card objects.
+
+    The serialized json of each object is cached until the object, or any
+    object below it, is changed through its setters. Changing the lists
+    returned by item access in place bypasses this, so use the set_* and
+    add_* methods, or assign a new list.
+
+    The fields of a subclass are given as an OrderedDict of Field in
+    _fields, and are added to the fields of its base classes.
+    """
+
+    __slots__ = ("_cache", "_digest", "_parents", "__weakref__")
+
+    # Static payload entries, like @type, written before the fields.
+    _payload = OrderedDict()
+
+    # Payload entries without a field, kept by from_payload and written
+    # after the fields, as an OrderedDict.
+    _extra = None
 
     def __init__(self, **kwargs):
         """Create CardObject.
 
         Any of the CardObject fields can be set as keyword arguments.
         """
-        self._payload = OrderedDict()
         self._attrs = {}
+        self._cache = None
+        self._digest = None
+        self._parents = None
 
         for name, value in _viewitems(kwargs):
             self._set_field(name, value)
 
     def _check_value(self, field, value):
-        """Check if value is or or can be converted to the correct type."""
-        if field not in self._fields:
+        """Check if value is or or can be converted to the correct type.
+
+        Values for iterable fields are always returned as a new list.
+        """
+        try:
+            check = self._get_checks()[field]
+        except KeyError:
             raise ValueError("Unknown field {}".format(field))
+        exp_type = check.expected_type
 
-        exp_type = self._fields[field].expected_type
-        allow_iter = self._fields[field].allow_iter
-        valid_values = self._fields[field].valid_values
+        if type(value) is _Unparsed:
+            value = value.load()
 
-        if _is_iter(value) and allow_iter:
-            wrong_types = [not isinstance(v, exp_type) for v in value]
-            if any(wrong_types):
-                wrong_type = type(value[wrong_types.index(True)])
+        if type(value) is FactColumns:
+            if not (check.allow_iter and exp_type is Fact):
                 raise TypeError(
-                    "Got iterable containing object of incorrect "
-                    " type ({}). Expected {}".format(wrong_type, exp_type)
+                    "Got argument of wrong type ({}). Expected {}".format(
+                        type(value), exp_type
+                    )
                 )
             return value
 
-        if not isinstance(value, exp_type):
+        if check.allow_iter and type(value) in _ITER_TYPES:
+            for v in value:
+                if not isinstance(v, exp_type) and not _is_frozen(v, exp_type):
+                    raise TypeError(
+                        "Got iterable containing object of incorrect "
+                        " type ({}). Expected {}".format(type(v), exp_type)
+                    )
+            return list(value)
+
+        if not isinstance(value, exp_type) and not _is_frozen(value, exp_type):
             # Try to find converter
-            conv_name = "from_{}".format(type(value).__name__)
-            if not hasattr(exp_type, conv_name):
+            converter = check.converters.get(type(value).__name__)
+            if converter is None:
                 raise TypeError(
                     "Got argument of wrong type ({}). Expected {}".format(
                         type(value), exp_type
                     )
                 )
-            value = getattr(exp_type, conv_name)(value)
+            value = converter(value)
 
-        if valid_values is not None and value not in valid_values:
+        if check.valid_set is not None and (
+            type(value) in _ITER_TYPES or value not in check.valid_set
+        ):
             raise ValueError(
                 "Got invalid value for {}: ({}). "
-                "Valid values are {}".format(field, value, valid_values)
+                "Valid values are {}".format(field, value, check.valid_values)
             )
 
-        if not _is_iter(value) and allow_iter:
+        if check.allow_iter and type(value) not in _ITER_TYPES:
             value = [value]
 
         return value
 
+    def _sanitize(self, field, value):
+        """Check value, unless in unchecked or lazy mode.
+
+        In unchecked and lazy mode the value is only shaped: values like a
+        dict of facts are converted, so that they can be serialized, and
+        single values for iterable fields are wrapped in a list.
+        """
+        if getattr(_local, "mode", None) is None:
+            return self._check_value(field, value)
+        check = self._get_checks().get(field)
+        if check is None:
+            raise ValueError("Unknown field {}".format(field))
+        converter = check.converters.get(type(value).__name__)
+        if converter is not None and not isinstance(value, check.expected_type):
+            value = converter(value)
+        if check.allow_iter and type(value) is not FactColumns:
+            value = list(value) if type(value) in _ITER_TYPES else [value]
+        return value
+
+    def _store(self, field, value):
+        """Store an already sanitized value."""
+        self._attrs[field] = value
+        self._adopt(value)
+        self._invalidate()
+
     def _set_field(self, field, value):
         """Sanitize and set attribute of CardObject."""
+        self._store(field, self._sanitize(field, value))
+        if getattr(_local, "mode", None) is _LAZY:
+            self._cache = _PENDING
+
+    def _append_field(self, field, value):
+        """Sanitize value and append it to an iterable field.
+
+        Only the appended items are checked, so building up a list one item
+        at a time takes linear time.
+        """
+        items = self._sanitize(field, value)
+        current = self._attrs.get(field)
+        if type(current) is _Unparsed:
+            current = self[field]
+        if current is None:
+            self._attrs[field] = items
+        elif type(current) is list and type(items) is list:
+            current.extend(items)
+        else:
+            # Columnar values are immutable and concatenated instead
+            self._attrs[field] = current + items
+        self._adopt(items)
+        self._invalidate()
+        if getattr(_local, "mode", None) is _LAZY:
+            self._cache = _PENDING
+
+    def _adopt(self, value):
+        """Register self as parent of the CardObjects in value."""
+        if isinstance(value, CardObject):
+            value._add_parent(self)
+        elif _is_iter(value):
+            for item in value:
+                if isinstance(item, CardObject):
+                    item._add_parent(self)
+
+    def _add_parent(self, parent):
+        """Keep a weak reference to a CardObject containing self.
+
+        A single parent is stored as a reference, multiple ones in a weak
+        dict by id, which forgets them when they are collected. Objects hash
+        by payload, so they can not be kept in a WeakSet.
+        """
+        parents = self._parents
+        if parents is None:
+            self._parents = weakref.ref(parent)
+        elif isinstance(parents, weakref.WeakValueDictionary):
+            if id(parent) not in parents:
+                parents[id(parent)] = parent
+        else:
+            current = parents()
+            if current is None:
+                self._parents = weakref.ref(parent)
+            elif current is not parent:
+                self._parents = weakref.WeakValueDictionary(
+                    ((id(current), current), (id(parent), parent))
+                )
 
-        sanitized_value = self._check_value(field, value)
-        self._attrs[field] = sanitized_value
+    def _invalidate(self):
+        """Drop the cached json of self and of all objects containing it."""
+        if self._cache is None or self._cache is _PENDING:
+            # Parents are never cached while a child is not
+            return
+        self._cache = None
+        self._digest = None
+        parents = self._parents
+        if isinstance(parents, weakref.WeakValueDictionary):
+            for parent in list(parents.values()):
+                parent._invalidate()
+        elif parents is not None:
+            parent = parents()
+            if parent is not None:
+                parent._invalidate()
+
+    def __getstate__(self):
+        """Return the field values for pickling and copying.
+
+        Lists are copied, since they are extended in place by the add_*
+        methods. Payload entries without a field are returned with them.
+        """
+        state = dict(
+            (name, list(value) if type(value) is list else value)
+            for name, value in _viewitems(self._attrs)
+        )
+        if self._extra:
+            return state, self._extra
+        return state
+
+    def __setstate__(self, state):
+        """Restore the field values from __getstate__."""
+        if type(state) is tuple:
+            state, self._extra = state
+        self._attrs = {}
+        self._cache = None
+        self._digest = None
+        self._parents = None
+        for name, value in _viewitems(state):
+            self._attrs[name] = value
+            self._adopt(value)
 
     def __getitem__(self, key):
         """Return a field from CardObject."""
-        return self._attrs[key]
+        value = self._attrs[key]
+        if type(value) is _Unparsed:
+            # The new objects are not cached, so neither may self be
+            value = self._attrs[key] = value.load()
+            self._adopt(value)
+            self._invalidate()
+        return value
 
     def __setitem__(self, key, value):
         """Set field to CardObject."""
         self._set_field(key, value)
 
+    @classmethod
+    def from_payload(cls, payload, lazy=False):
+        """Create an object, and all objects below it, from a python payload.
+
+        Objects are created as the class given by their @type, and values
+        are checked like when set. Keys without a field, like ones added to
+        the format after this library, are kept and serialized as given.
+        Objects with only plain value fields, like Fact, raise ValueError
+        for them instead.
+
+        payload -- Payload dict, like the one returned by get_payload.
+        lazy -- Only create the objects below the top one when they are
+                accessed. Until then they are serialized as given.
+
+        >>> card = MessageCard.from_payload({"summary": "Hi", "sections": [{}]})
+        >>> card["sections"]
+        [CardSection()]
+        """
+        return _load(cls, payload, lazy)
+
+    @classmethod
+    def from_json(cls, data, lazy=False):
+        """Create an object from a json payload, as text or UTF-8 bytes.
+
+        See from_payload for details.
+        """
+        if isinstance(data, bytes) and not isinstance(data, str):
+            data = data.decode("utf-8")
+        return _load(cls, json.loads(data, object_pairs_hook=OrderedDict), lazy)
+
+    def freeze(self):
+        """Return the object serialized once, as a RawFragment.
+
+        The fragment can be used instead of the object in any card, and is
+        written as is, without being checked or serialized again.
+
+        >>> footer = OpenUriAction("Docs", {"default": "https://example.com"})
+        >>> frozen = footer.freeze()
+        >>> card = MessageCard(potential_action=[frozen])
+        >>> card.payload["potentialAction"] == [footer.payload]
+        True
+        """
+        return RawFragment(type(self), self._encode_checked())
+
+    @classmethod
+    def construct(cls, *args, **kwargs):
+        """Create an object without checking the values.
+
+        Takes the same arguments as the class. See unchecked for details.
+        """
+        with unchecked():
+            return cls(*args, **kwargs)
+
+    def validate(self, path=None):
+        """Check the fields of the object and of all objects below it.
+
+        Values that need conversion, like a dict of facts, are converted.
+        Raises TypeError or ValueError with the path to the offending field.
+        """
+        for name, value in list(_viewitems(self._attrs)):
+            field_path = name if path is None else "{}.{}".format(path, name)
+            try:
+                checked = self._check_value(name, value)
+            except (TypeError, ValueError) as e:
+                raise type(e)("{}: {}".format(field_path, e))
+            if type(value) is not list and checked is not value:
+                self._store(name, checked)
+            if isinstance(checked, CardObject):
+                checked.validate(field_path)
+            elif type(checked) is list:
+                for i, item in enumerate(checked):
+                    if isinstance(item, CardObject):
+                        item.validate("{}[{}]".format(field_path, i))
+        if self._cache is _PENDING:
+            self._cache = None
+
+    def _validate_pending(self):
+        """Check the fields of the object if it was built in lazy mode."""
+        if self._cache is not _PENDING:
+            return
+        for name, value in list(_viewitems(self._attrs)):
+            checked = self._check_value(name, value)
+            if type(value) is not list and checked is not value:
+                self._store(name, checked)
+        self._cache = None
+
+    def _report_path(self, error):
+        """Re-raise error from lazy validation with the path to the field.
+
+        Objects validated lazily only know their own field names, so the
+        tree is validated from the top to find the path.
+        """
+        self.validate()
+        raise error
+
     def __str__(self):
         """Return a string representation of the CardObject."""
         pop_fields = [k for k in self._fields.keys() if k in self._attrs]
@@ -127,15 +632,45 @@ class CardObject(object):
 
     def __eq__(self, other):
         """Check for equality by checking that all set fields are equal."""
+        if type(other) is RawFragment:
+            return other == self
         if type(self) != type(other):
             return False
 
-        for key in self._attrs.keys():
-            if key not in other._attrs or self[key] != other[key]:
+        attrs = self._attrs
+        other_attrs = other._attrs
+        if len(attrs) != len(other_attrs) or self._extra != other._extra:
+            return False
+        for key in attrs.keys():
+            if key not in other_attrs or self[key] != other[key]:
                 return False
 
         return True
 
+    def __hash__(self):
+        """Hash of the serialized json, which is cached until a change.
+
+        Like for dicts used as keys, an object must not be changed while it
+        is in a set or used as a key.
+        """
+        return hash(self._encode_checked())
+
+    def digest(self):
+        """Return the SHA-1 hex digest of the compact json payload.
+
+        Equals the digest of to_bytes(), and is cached until the object or
+        any object below it is changed.
+
+        >>> Fact("name", "value").digest() == Fact("name", "value").digest()
+        True
+        """
+        digest = self._digest
+        if digest is None:
+            text = self._encode_checked()
+            digest = hashlib.sha1(text.encode("ascii")).hexdigest()
+            self._digest = digest
+        return digest
+
     def __ne__(self, other):
         """Not equals check."""
         return not self.__eq__(other)
@@ -150,24 +685,433 @@ class CardObject(object):
         """Payload on json format expected by Teams."""
         return self.get_payload(fmt="json")
 
+    @classmethod
+    def _get_plan(cls):
+        """Return the serialization plan for the class."""
+        return cls._plan
+
+    @classmethod
+    def _get_checks(cls):
+        """Return the value checks for the fields of the class."""
+        return cls._checks
+
     def get_payload(self, fmt="python", indent=None):
-        """Return card payload on python or json format."""
-        payload = self._payload.copy()
-        for field_name in self._fields.keys():
-            if field_name in self._attrs:
-                value = self._attrs[field_name]
-                if isinstance(value, CardObject):
-                    value = value.payload
-                if type(value) in (list, tuple):
-                    value = [v.payload for v in value]
-                payload[_snake_to_dromedary_case(field_name)] = value
-        if fmt == "json":
-            separators = (",", ": ") if indent is not None else (", ", ": ")
-            payload = json.dumps(payload, indent=indent, separators=separators)
+        """Return card payload on python, json or bytes format.
+
+        The bytes format is the compact json payload encoded as UTF-8.
+        """
+        if indent is None:
+            if fmt == "bytes":
+                return self.to_bytes()
+            if fmt == "json":
+                return self._encode_checked()
+
+        try:
+            payload = self._python_payload()
+        except (TypeError, ValueError) as e:
+            self._report_path(e)
+        if fmt in ("json", "bytes"):
+            payload = json.dumps(payload, indent=indent, separators=(",", ": "))
+            if fmt == "bytes":
+                payload = payload.encode("utf-8")
         return payload
 
+    def _python_payload(self):
+        """Return the payload as python objects."""
+        self._validate_pending()
+        payload = OrderedDict(self._payload)
+        attrs = self._attrs
+        for name, key, _, kind in self._get_plan():
+            if name not in attrs:
+                continue
+            value = attrs[name]
+            if type(value) is _Unparsed:
+                value = self[name]
+            if kind == _OBJECT:
+                value = value._python_payload()
+            elif kind == _OBJECT_LIST:
+                value = [v._python_payload() for v in value]
+            elif kind == _LIST:
+                value = list(value)
+            payload[key] = value
+        if self._extra:
+            payload.update(self._extra)
+        return payload
+
+    def to_bytes(self):
+        """Return the compact json payload as UTF-8 encoded bytes.
+
+        This is what is sent to Teams, and can be handed to any transport
+        as is.
+        """
+        return self._encode_checked().encode("ascii")
+
+    def estimate_size(self):
+        """Return the size in bytes of the compact json payload.
+
+        Exact if the object has not changed since it was last serialized.
+        Otherwise it is estimated from the field values without serializing
+        them, and may be low for strings with characters that are escaped.
+
+        >>> card = MessageCard(title="Title")
+        >>> card.estimate_size() == len(card.to_bytes())
+        True
+        """
+        cache = self._cache
+        if cache is not None and cache is not _PENDING:
+            return len(cache)
+        size = 0
+        count = 0
+        for key, value in _viewitems(self._payload):
+            size += len(_encode_str(key)) + 2 + _value_size(value)
+            count += 1
+        attrs = self._attrs
+        for name, _, json_key, kind in self._get_plan():
+            if name not in attrs:
+                continue
+            value = attrs[name]
+            count += 1
+            size += len(json_key)
+            if kind == _OBJECT_LIST and type(value) is list:
+                sizes = [v.estimate_size() for v in value]
+                size += sum(sizes) + 2 * max(len(value), 1)
+            elif kind == _OBJECT or kind == _OBJECT_LIST:
+                size += value.estimate_size()
+            else:
+                size += _value_size(value)
+        for key, value in _viewitems(self._extra or {}):
+            size += len(_encode_str(key)) + 2 + _value_size(value)
+            count += 1
+        return size + 2 * max(count, 1)
+
+    def _encode_checked(self):
+        """Return the compact json payload as text, with error paths."""
+        try:
+            return self._encode()
+        except (TypeError, ValueError) as e:
+            self._report_path(e)
+
+    def _encode(self):
+        """Return the compact json payload as text.
+
+        The result is cached until the object or any of its children change,
+        so only changed subtrees are serialized again.
+        """
+        cache = self._cache
+        if cache is None or cache is _PENDING:
+            self._validate_pending()
+            chunks = []
+            self._write_json(chunks.append)
+            cache = self._cache = "".join(chunks)
+        return cache
+
+    def _write_json(self, write):
+        """Write the compact json representation using the write callable.
+
+        Walks the object once, without building an intermediate payload, and
+        writes the cached json of child objects. The output is escaped to
+        ASCII, so encoding it as ASCII gives the UTF-8 payload.
+        """
+        sep = "{"
+        for key, value in _viewitems(self._payload):
+            write(sep + _encode_str(key) + ": " + _encode_value(value))
+            sep = ", "
+        attrs = self._attrs
+        for name, _, json_key, kind in self._get_plan():
+            if name not in attrs:
+                continue
+            value = attrs[name]
+            if kind == _SCALAR:
+                if type(value) is str:
+                    write(sep + json_key + _encode_str(value))
+                else:
+                    write(sep + json_key + _encode_value(value))
+            elif type(value) is FactColumns or type(value) is _Unparsed:
+                write(sep + json_key + value._encode())
+            elif kind == _OBJECT_LIST:
+                write(sep + json_key)
+                item_sep = "["
+                for item in value:
+                    write(item_sep + item._encode())
+                    item_sep = ", "
+                write("[]" if item_sep == "[" else "]")
+            elif kind == _OBJECT:
+                write(sep + json_key + value._encode())
+            else:
+                items = ", ".join([_encode_value(v) for v in value])
+                write(sep + json_key + "[" + items + "]")
+            sep = ", "
+        for key, value in _viewitems(self._extra or {}):
+            write(sep + _encode_str(key) + ": " + _encode_value(value))
+            sep = ", "
+        write("{}" if sep == "{" else "}")
+
+    def dump(self, fp):
+        """Write the compact json payload to the file-like object fp.
+
+        Text is written to text files, and UTF-8 bytes to binary files.
+        """
+        if isinstance(fp, io.TextIOBase):
+            # The json is ASCII, so this only makes it unicode on python 2
+            fp.write(self.to_bytes().decode("ascii"))
+        else:
+            fp.write(self.to_bytes())
+
+
+def _is_frozen(value, card_type):
+    """Check if value is a RawFragment of card_type or a subclass of it."""
+    return type(value) is RawFragment and issubclass(value.card_type, card_type)
+
+
+class RawFragment(object):
+    """Immutable, already serialized card object, created by freeze.
+
+    Is accepted wherever an object of its card_type is, and its json is
+    written as is. Use thaw to get an object that can be changed.
+    """
+
+    __slots__ = ("card_type", "text", "_bytes", "_digest")
+
+    def __init__(self, card_type, text):
+        self.card_type = card_type
+        self.text = text
+        self._bytes = None
+        self._digest = None
+
+    def _encode(self):
+        return self.text
+
+    def _python_payload(self):
+        return json.loads(self.text, object_pairs_hook=OrderedDict)
 
-class ImageObject(CardObject):
+    @property
+    def payload(self):
+        """Payload on python format."""
+        return self._python_payload()
+
+    @property
+    def json_payload(self):
+        """Payload on json format expected by Teams."""
+        return self.text
+
+    def estimate_size(self):
+        """Return the size in bytes of the json."""
+        return len(self.text)
+
+    def to_bytes(self):
+        """Return the compact json payload as UTF-8 encoded bytes."""
+        if self._bytes is None:
+            self._bytes = self.text.encode("ascii")
+        return self._bytes
+
+    def digest(self):
+        """Return the SHA-1 hex digest of the json."""
+        if self._digest is None:
+            self._digest = hashlib.sha1(self.to_bytes()).hexdigest()
+        return self._digest
+
+    def thaw(self):
+        """Return a new card object created from the fragment."""
+        return self.card_type.from_json(self.text)
+
+    def __eq__(self, other):
+        """Compare the json with other fragments and objects of card_type."""
+        if type(other) is RawFragment:
+            return self.card_type is other.card_type and self.text == other.text
+        if type(other) is self.card_type:
+            return self.text == other._encode_checked()
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.text)
+
+    def __repr__(self):
+        return "RawFragment({}, {!r})".format(self.card_type.__name__, self.text)
+
+    def __reduce__(self):
+        return (RawFragment, (self.card_type, self.text))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _Unparsed(object):
+    """Payload of card objects that have not been created yet.
+
+    Used by lazy from_payload. Serializes to the payload as given.
+    """
+
+    def __init__(self, expected_type, payload, is_list):
+        self.expected_type = expected_type
+        self.payload = payload
+        self.is_list = is_list
+
+    def load(self):
+        """Create the card objects from the payload."""
+        if self.is_list:
+            return [_load(self.expected_type, p, True) for p in self.payload]
+        return _load(self.expected_type, self.payload, True)
+
+    def _encode(self):
+        return json.dumps(self.payload, separators=(", ", ": "))
+
+    def estimate_size(self):
+        return len(self._encode())
+
+
+def _load(expected_type, payload, lazy, path=None):
+    """Create a card object of expected_type, or a subclass, from payload."""
+    if not isinstance(payload, dict):
+        raise TypeError(
+            "{}Got payload of wrong type ({}). Expected dict".format(
+                "" if path is None else path + ": ", type(payload)
+            )
+        )
+    cls = expected_type
+    type_name = payload.get("@type")
+    if type_name is not None and type_name != cls._payload.get("@type"):
+        cls = _card_types.get(type_name)
+        if cls is None or not issubclass(cls, expected_type):
+            raise ValueError(
+                "{}Unknown @type {} for {}".format(
+                    "" if path is None else path + ": ",
+                    type_name,
+                    expected_type.__name__,
+                )
+            )
+
+    obj = cls.__new__(cls)
+    attrs = {}
+    extra = OrderedDict()
+    for key, value in _viewitems(payload):
+        field_path = key if path is None else "{}.{}".format(path, key)
+        try:
+            name, kind = cls._field_keys[key]
+        except KeyError:
+            if key in cls._payload:
+                continue
+            if issubclass(cls, _LeafObject):
+                raise ValueError(
+                    "{}: Unknown key for {}".format(field_path, cls.__name__)
+                )
+            extra[key] = value
+            continue
+        if kind == _OBJECT or kind == _OBJECT_LIST:
+            item_type = cls._checks[name].expected_type
+            is_list = kind == _OBJECT_LIST and type(value) in _ITER_TYPES
+            if lazy:
+                attrs[name] = _Unparsed(item_type, value, is_list)
+                continue
+            if is_list:
+                value = [
+                    _load(item_type, v, lazy, "{}[{}]".format(field_path, i))
+                    for i, v in enumerate(value)
+                ]
+            else:
+                value = _load(item_type, value, lazy, field_path)
+        try:
+            attrs[name] = obj._check_value(name, value)
+        except (TypeError, ValueError) as e:
+            raise type(e)("{}: {}".format(field_path, e))
+    obj.__setstate__((attrs, extra) if extra else attrs)
+    return obj
+
+
+def _has_facts(section):
+    """Check if a CardSection or a frozen one has any facts."""
+    if type(section) is RawFragment:
+        return bool(section.payload.get("facts"))
+    return bool(section._attrs.get("facts"))
+
+
+def _copy_fields(obj, names, extra=False):
+    """Return a new object of the same type with only the given fields.
+
+    Lists are copied, so that the objects do not share them. With extra,
+    the payload entries without a field are copied as well.
+    """
+    attrs = obj._attrs
+    state = {}
+    for name in names:
+        if name in attrs:
+            value = attrs[name]
+            state[name] = list(value) if type(value) is list else value
+    new = type(obj).__new__(type(obj))
+    new.__setstate__((state, obj._extra) if extra and obj._extra else state)
+    return new
+
+
+class _LeafObject(CardObject):
+    """Base class for compact card objects with only plain value fields.
+
+    Field values are stored in slots named after the field with a leading
+    underscore, instead of in a dict, to keep instances small.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **kwargs):
+        self._cache = None
+        self._digest = None
+        self._parents = None
+
+        for name, value in _viewitems(kwargs):
+            self._set_field(name, value)
+
+    @property
+    def _attrs(self):
+        """Dict with the fields that are set."""
+        attrs = {}
+        for name in self._fields:
+            value = getattr(self, "_" + name, None)
+            if value is not None:
+                attrs[name] = value
+        return attrs
+
+    def _store(self, field, value):
+        """Store an already sanitized value."""
+        setattr(self, "_" + field, value)
+        self._invalidate()
+
+    def _set_field(self, field, value):
+        """Sanitize and set attribute of CardObject."""
+        self._store(field, self._sanitize(field, value))
+        if getattr(_local, "mode", None) is _LAZY:
+            self._cache = _PENDING
+
+    def __setstate__(self, state):
+        """Restore the field values from __getstate__."""
+        self._cache = None
+        self._digest = None
+        self._parents = None
+        for name, value in _viewitems(state):
+            setattr(self, "_" + name, value)
+
+    def __getitem__(self, key):
+        """Return a field from CardObject."""
+        value = getattr(self, "_" + key, None) if key in self._fields else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def _write_json(self, write):
+        """Write the compact json representation using the write callable."""
+        sep = "{"
+        for name, _, json_key, _ in self._get_plan():
+            value = getattr(self, "_" + name, None)
+            if value is not None:
+                write(sep + json_key + _encode_value(value))
+                sep = ", "
+        write("{}" if sep == "{" else "}")
+
+
+class ImageObject(_LeafObject):
     """Class representing a card image.
 
     See the Microsoft documentation for more details:
@@ -181,6 +1125,8 @@ class ImageObject(CardObject):
     {"image": "http://www.image.com", "title": "Image title"}
     """
 
+    __slots__ = ("_image", "_title")
+
     _fields = OrderedDict((("image", Field(str, False)), ("title", Field(str, False))))
 
     def __init__(self, image, title=None):
@@ -207,7 +1153,7 @@ class ImageObject(CardObject):
         self._set_field("title", title)
 
 
-class Fact(CardObject):
+class Fact(_LeafObject):
     """Class wrapping a fact.
 
     See Microsoft documentation for more details:
@@ -218,6 +1164,8 @@ class Fact(CardObject):
     {"name": "name", "value": "value"}
     """
 
+    __slots__ = ("_name", "_value")
+
     _fields = OrderedDict((("name", Field(str, False)), ("value", Field(str, False))))
 
     def __init__(self, name, value):
@@ -240,7 +1188,128 @@ class Fact(CardObject):
         return Fact.from_dict(d)
 
 
-class UriTarget(CardObject):
+def _column(values):
+    """Return values as a list of strings, converting any other values."""
+    if hasattr(values, "tolist"):
+        # NumPy arrays and pandas series
+        values = values.tolist()
+    return [v if isinstance(v, _string_types) else str(v) for v in values]
+
+
+class FactColumns(object):
+    """Immutable sequence of facts stored as a column of names and values.
+
+    Can be used anywhere a list of facts is accepted, and is serialized
+    directly to the json array of facts, without creating Fact objects.
+    Names and values can be any sequences, including NumPy arrays and pandas
+    series, and values that are not strings are converted with str.
+
+    >>> facts = FactColumns(["cpu", "mem"], [0.5, "2 GB"])
+    >>> len(facts), facts[0]
+    (2, Fact(name = cpu, value = 0.5))
+    >>> print(CardSection(facts=facts).json_payload)
+    {"facts": [{"name": "cpu", "value": "0.5"}, {"name": "mem", "value": "2 GB"}]}
+    """
+
+    __slots__ = ("names", "values", "_cache")
+
+    def __init__(self, names, values):
+        self.names = _column(names)
+        self.values = _column(values)
+        if len(self.names) != len(self.values):
+            raise ValueError(
+                "Got {} names and {} values".format(len(self.names), len(self.values))
+            )
+        self._cache = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Create FactColumns from an iterable of (name, value) pairs."""
+        rows = list(rows)
+        return cls([r[0] for r in rows], [r[1] for r in rows])
+
+    @classmethod
+    def from_facts(cls, facts):
+        """Create FactColumns from an iterable of Facts."""
+        facts = list(facts)
+        return cls([f["name"] for f in facts], [f["value"] for f in facts])
+
+    def _encode(self):
+        """Return the facts as a compact json array."""
+        if self._cache is None:
+            items = [
+                '{"name": ' + _encode_str(n) + ', "value": ' + _encode_str(v) + "}"
+                for n, v in zip(self.names, self.values)
+            ]
+            self._cache = "[" + ", ".join(items) + "]"
+        return self._cache
+
+    def fact_sizes(self):
+        """Return the size in bytes of the json of each fact."""
+        # {"name": , "value": } is 21 characters
+        return [
+            len(_encode_str(n)) + len(_encode_str(v)) + 21
+            for n, v in zip(self.names, self.values)
+        ]
+
+    def estimate_size(self):
+        """Return the size in bytes of the json array of facts."""
+        if self._cache is not None:
+            return len(self._cache)
+        return sum(self.fact_sizes()) + 2 * max(len(self.names), 1)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FactColumns(self.names[index], self.values[index])
+        return Fact(self.names[index], self.values[index])
+
+    def __iter__(self):
+        for name, value in zip(self.names, self.values):
+            yield Fact(name, value)
+
+    def __add__(self, other):
+        """Concatenate with other FactColumns or a list of Facts."""
+        if not isinstance(other, FactColumns):
+            if type(other) not in _ITER_TYPES:
+                return NotImplemented
+            other = FactColumns.from_facts(other)
+        return FactColumns(self.names + other.names, self.values + other.values)
+
+    def __radd__(self, other):
+        if type(other) not in _ITER_TYPES:
+            return NotImplemented
+        return FactColumns.from_facts(other) + self
+
+    def __eq__(self, other):
+        """Compare equal to FactColumns and lists of Facts with same facts."""
+        if isinstance(other, FactColumns):
+            return self.names == other.names and self.values == other.values
+        if type(other) in _ITER_TYPES:
+            return list(self) == list(other)
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "FactColumns({!r}, {!r})".format(self.names, self.values)
+
+    def __reduce__(self):
+        return (FactColumns, (self.names, self.values))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class UriTarget(_LeafObject):
     """Class wrapping a URI target.
 
     See Microsoft documentation for more details:
@@ -253,6 +1322,8 @@ class UriTarget(CardObject):
     OrderedDict([('os', 'default'), ('uri', 'http://www.python.org')])
     """
 
+    __slots__ = ("_os", "_uri")
+
     _fields = OrderedDict((("os", Field(str, False)), ("uri", Field(str, False))))
 
     def __init__(self, os, uri):
@@ -284,6 +1355,8 @@ class OpenUriAction(Action):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#openuri-action
     """
 
+    _payload = OrderedDict({"@type": "OpenUri"})
+
     _fields = OrderedDict(
         (("name", Field(str, False)), ("targets", Field(UriTarget, True)))
     )
@@ -308,26 +1381,25 @@ class OpenUriAction(Action):
         """
         super(OpenUriAction, self).__init__()
 
-        self._payload["@type"] = "OpenUri"
-
         self._set_field("name", name)
         self._set_field("targets", targets)
 
     def add_target(self, os, uri):
         """Add URI for a new target."""
-        target_list = self._attrs.get("targets")
-        os_list = [target["os"] for target in target_list]
+        os_list = [target["os"] for target in self._attrs.get("targets", [])]
         if os in os_list:
             raise ValueError("Target already set for {}".format(os))
-        target_list.append(UriTarget(os=os, uri=uri))
+        self._append_field("targets", UriTarget(os=os, uri=uri))
 
 
-class Header(CardObject):
+class Header(_LeafObject):
     """Class wrapping a header.
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#header
 
     """
 
+    __slots__ = ("_name", "_value")
+
     _fields = OrderedDict((("name", Field(str, False)), ("value", Field(str, False))))
 
     def __init__(self, name, value):
@@ -357,6 +1429,8 @@ class HttpPostAction(Action):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#httppost-action
     """
 
+    _payload = OrderedDict({"@type": "HttpPOST"})
+
     _fields = OrderedDict(
         (
             ("name", Field(str, False)),
@@ -402,8 +1476,6 @@ class HttpPostAction(Action):
         """
         super(HttpPostAction, self).__init__(**kwargs)
 
-        self._payload["@type"] = "HttpPOST"
-
         self._set_field("name", name)
         self._set_field("target", target)
 
@@ -413,10 +1485,7 @@ class HttpPostAction(Action):
 
     def add_header(self, header):
         """Add header to header list."""
-        header_list = self._attrs.get("headers", [])
-        header = self._check_value("headers", header)
-        header_list.extend(header)
-        self._set_field("headers", header_list)
+        self._append_field("headers", header)
 
     def set_body(self, body):
         """Set body for HttpPostAction."""
@@ -465,14 +1534,11 @@ class TextInput(Input):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#textinput
     """
 
-    def __init__(self, **kwargs):
-        sub_fields = OrderedDict(
-            (("is_multiline", Field(bool, False)), ("max_length", Field(int, False)))
-        )
-        self._fields.update(sub_fields)
-        super(TextInput, self).__init__(**kwargs)
+    _payload = OrderedDict({"@type": "TextInput"})
 
-        self._payload["@type"] = "TextInput"
+    _fields = OrderedDict(
+        (("is_multiline", Field(bool, False)), ("max_length", Field(int, False)))
+    )
 
     def set_is_multiline(self, is_multiline):
         """Set isMultiline for input."""
@@ -489,22 +1555,22 @@ class DateInput(Input):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#dateinput
     """
 
-    def __init__(self, **kwargs):
-        self._fields["include_time"] = Field(bool, False)
-        super(DateInput, self).__init__(**kwargs)
+    _payload = OrderedDict({"@type": "DateInput"})
 
-        self._payload["@type"] = "DateInput"
+    _fields = OrderedDict((("include_time", Field(bool, False)),))
 
     def set_include_time(self, include_time):
         """Set includeTime for DateInput."""
         self._set_field("include_time", include_time)
 
 
-class Choice(CardObject):
+class Choice(_LeafObject):
     """
     Class representing a key/value pair as a choice for MultipleChoiceInput.
     """
 
+    __slots__ = ("_display", "_value")
+
     _fields = OrderedDict(
         (("display", Field(str, False)), ("value", Field(str, False)))
     )
@@ -537,18 +1603,15 @@ class MultipleChoiceInput(Input):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#multichoiceinput
     """
 
-    def __init__(self, **kwargs):
-        sub_fields = OrderedDict(
-            (
-                ("choices", Field(Choice, True)),
-                ("is_multi_select", Field(bool, False)),
-                ("style", Field(str, False, ["normal", "expanded"])),
-            )
-        )
-        self._fields.update(sub_fields)
-        super(MultipleChoiceInput, self).__init__(**kwargs)
+    _payload = OrderedDict({"@type": "MultipleChoiceInput"})
 
-        self._payload["@type"] = "MultipleChoiceInput"
+    _fields = OrderedDict(
+        (
+            ("choices", Field(Choice, True)),
+            ("is_multi_select", Field(bool, False)),
+            ("style", Field(str, False, ["normal", "expanded"])),
+        )
+    )
 
     def set_choices(self, choices):
         """Set choices for input."""
@@ -556,10 +1619,7 @@ class MultipleChoiceInput(Input):
 
     def add_choices(self, choice):
         """Append choices to list."""
-        choice = self._check_value("choices", choice)
-        choice_list = list(self._attrs.get("choices", []))
-        choice_list.extend(choice)
-        self._set_field("choices", choice_list)
+        self._append_field("choices", choice)
 
     def set_is_multi_select(self, is_multi_select):
         """Set isMultiSelect for intput."""
@@ -576,6 +1636,8 @@ class ActionCard(Action):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference#actioncard-action
     """
 
+    _payload = OrderedDict({"@type": "ActionCard"})
+
     _fields = OrderedDict(
         (
             ("name", Field(str, False)),
@@ -584,10 +1646,6 @@ class ActionCard(Action):
         )
     )
 
-    def __init__(self, **kwargs):
-        super(ActionCard, self).__init__(**kwargs)
-        self._payload["@type"] = "ActionCard"
-
     def set_name(self, name):
         """Set name."""
         self._set_field("name", name)
@@ -597,10 +1655,7 @@ class ActionCard(Action):
 
     def add_inputs(self, inputs):
         """Append inputs to ActionCard."""
-        inputs = self._check_value("inputs", inputs)
-        input_list = list(self._attrs.get("inputs", []))
-        input_list.extend(inputs)
-        self._set_field("inputs", inputs)
+        self._append_field("inputs", inputs)
 
     def set_actions(self, actions):
         """Set action list for ActionCard."""
@@ -608,10 +1663,7 @@ class ActionCard(Action):
 
     def add_actions(self, actions):
         """Append actions to ActionCard."""
-        actions = self._check_value("actions", actions)
-        action_list = list(self._attrs.get("actions", []))
-        action_list.extend(actions)
-        self._set_field("actions", actions)
+        self._append_field("actions", actions)
 
 
 class CardSection(CardObject):
@@ -688,26 +1740,40 @@ class CardSection(CardObject):
         fact -- Fact name (str)
         value -- fact value (str)
         """
-        facts = list(self._attrs.get("facts", []))
-        facts.append(Fact(name=fact, value=value))
-        self._set_field("facts", facts)
+        self._append_field("facts", Fact(name=fact, value=value))
 
     def add_facts(self, facts):
         """Append facts to card.
 
         facts: tuple or list containing Facts, or dict with key/value pairs.
         """
-        fact_list = list(self._attrs.get("facts", []))
-        fact_list.extend(self._check_value("facts", facts))
-        self._set_field("facts", fact_list)
+        self._append_field("facts", facts)
+
+    def set_facts_from_columns(self, names, values):
+        """Set facts from a column of names and a column of values.
+
+        The facts are stored compactly as FactColumns, see its documentation.
+
+        names -- Sequence of fact names.
+        values -- Sequence of fact values, of the same length as names.
+        """
+        self._set_field("facts", FactColumns(names, values))
+
+    def add_facts_from_columns(self, names, values):
+        """Append facts from a column of names and a column of values."""
+        self._append_field("facts", FactColumns(names, values))
+
+    def set_facts_from_rows(self, rows):
+        """Set facts from an iterable of (name, value) pairs."""
+        self._set_field("facts", FactColumns.from_rows(rows))
 
     def add_potential_action(self, potential_action):
         """Append a PotentialAction object to the section."""
-        if not isinstance(potential_action, Action):
+        if not isinstance(potential_action, Action) and not _is_frozen(
+            potential_action, Action
+        ):
             raise TypeError("Expected Action, got {}".format(type(potential_action)))
-        potential_actions = self._attrs.get("potential_action", [])
-        potential_actions.append(potential_action)
-        self._set_field("potential_action", potential_actions)
+        self._append_field("potential_action", potential_action)
 
 
 class MessageCard(CardObject):
@@ -717,6 +1783,10 @@ class MessageCard(CardObject):
     https://docs.microsoft.com/en-us/outlook/actionable-messages/message-card-reference
     """
 
+    _payload = OrderedDict(
+        (("@type", "MessageCard"), ("@context", "https://schema.org/extensions"))
+    )
+
     _fields = OrderedDict(
         (
             ("summary", Field(str, False)),
@@ -748,9 +1818,6 @@ class MessageCard(CardObject):
         """
         super(MessageCard, self).__init__(**kwargs)
 
-        self._payload["@type"] = "MessageCard"
-        self._payload["@context"] = "https://schema.org/extensions"
-
         self.set_summary(summary)
 
     def set_summary(self, summary):
@@ -778,9 +1845,7 @@ class MessageCard(CardObject):
 
     def add_section(self, section):
         """Append a CardSection object to the card sections."""
-        sections = self._attrs.get("sections", [])
-        sections.append(section)
-        self._set_field("sections", sections)
+        self._append_field("sections", section)
 
     def set_potential_actions(self, potential_actions):
         """Set the potential_actions list for the card.
@@ -791,23 +1856,139 @@ class MessageCard(CardObject):
 
     def add_potential_action(self, potential_action):
         """Append a PotentialAction object to the card."""
-        potential_actions = self._attrs.get("potential_action", [])
-        potential_actions.append(potential_action)
-        self._set_field("potential_action", potential_actions)
+        self._append_field("potential_action", potential_action)
 
-    def send(self, connector_url, proxy=None):
-        """Send message card to Microsoft Teams webhook connector."""
+    def split(self, max_bytes=MAX_PAYLOAD_SIZE, continued="{title} (continued)"):
+        """Split the card into cards with payloads of at most max_bytes.
 
-        if proxy is not None:
-            if not isinstance(proxy, dict):
-                proxy = {"https": proxy}
-            proxy_handler = request.ProxyHandler(proxy)
-            opener = request.build_opener(proxy_handler)
-            request.install_opener(opener)
+        Sections are divided between the cards in order. A section that does
+        not fit in the room left in a card starts the next card if it fits
+        in that one, and is otherwise split by its facts, starting in the
+        room left. The first card keeps all fields of the card. The others
+        get the summary, theme color and the title formatted with continued.
+        Returns [self] if the card fits.
 
-        req = request.Request(
-            connector_url,
-            data=self.json_payload.encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-        )
-        return request.urlopen(req)
+        The sections of the cards are copies, but share the objects below
+        them, like facts, with the sections of self.
+
+        Raises ValueError if a section, without its facts, or a single fact
+        does not fit in a card.
+
+        >>> card = MessageCard(title="Report")
+        >>> card.add_section(CardSection(facts=[Fact(str(i), "x") for i in range(1000)]))
+        >>> [c["title"] for c in card.split()]
+        ['Report', 'Report (continued)']
+        """
+        if len(self._encode_checked()) <= max_bytes:
+            return [self]
+
+        parts = []  # [card, sections, bytes left]
+
+        def new_card():
+            if not parts:
+                card = _copy_fields(self, self._attrs, extra=True)
+            else:
+                card = _copy_fields(self, ("summary", "theme_color"))
+                if "title" in self._attrs:
+                    card._store("title", continued.format(title=self._attrs["title"]))
+            card._store("sections", [])
+            room = max_bytes - len(card._encode())
+            if room < 0:
+                raise ValueError(
+                    "Card without sections exceeds {} bytes".format(max_bytes)
+                )
+            parts.append([card, [], room])
+
+        def add(section, size):
+            part = parts[-1]
+            size += 2 if part[1] else 0
+            if size > part[2]:
+                return False
+            part[1].append(section)
+            part[2] -= size
+            return True
+
+        new_card()
+        for section in self["sections"]:
+            # Cached by the _encode_checked above, also for frozen sections
+            size = len(section._encode())
+            if type(section) is not RawFragment:
+                section = _copy_fields(section, section._attrs, extra=True)
+            if add(section, size):
+                continue
+            if parts[-1][1]:
+                new_card()
+                if add(section, size):
+                    continue
+                if _has_facts(section):
+                    # Split it starting in the room left in the previous card
+                    parts.pop()
+            self._split_section(section, parts, new_card, add, max_bytes)
+
+        for card, sections, _ in parts:
+            card._store("sections", sections)
+        return [part[0] for part in parts]
+
+    @staticmethod
+    def _split_section(section, parts, new_card, add, max_bytes):
+        """Add section to the cards in parts, divided by its facts."""
+        if type(section) is RawFragment:
+            section = section.thaw()
+        facts = section["facts"] if "facts" in section._attrs else None
+        if not facts:
+            raise ValueError("Section exceeds {} bytes".format(max_bytes))
+        if type(facts) is FactColumns:
+            sizes = facts.fact_sizes()
+        else:
+            sizes = [len(f._encode()) for f in facts]
+
+        names = [k for k in section._attrs if k != "facts"]
+        shell = _copy_fields(section, names, extra=True)
+        start = 0
+        while start < len(facts):
+            shell._store("facts", [])
+            part = parts[-1]
+            room = part[2] - len(shell._encode()) - (2 if part[1] else 0)
+            end = start
+            used = -2
+            while end < len(facts) and used + sizes[end] + 2 <= room:
+                used += sizes[end] + 2
+                end += 1
+            if end == start:
+                if not part[1]:
+                    raise ValueError("Fact exceeds {} bytes".format(max_bytes))
+                new_card()
+                continue
+            piece = shell
+            piece._store("facts", facts[start:end])
+            add(piece, len(piece._encode()))
+            start = end
+            # Only the title is repeated in the following pieces
+            shell = _copy_fields(section, ("title",))
+
+    def send(self, connector_url, proxy=None, connector=None):
+        """Send message card to Microsoft Teams webhook connector.
+
+        connector_url -- The webhook URL to post the card to.
+        proxy -- Proxy to use, either a string or a dict mapping URL scheme
+                 to proxy. Ignored if connector is given.
+        connector -- Connector to send through. Defaults to a shared
+                     Connector, pooling connections per proxy setting.
+        """
+        if connector is None:
+            connector = default_connector(proxy)
+        return connector.send(connector_url, self.to_bytes())
+
+    def send_async(self, connector_url, connector=None):
+        """Send message card from asyncio code. Requires Python 3.5+.
+
+        Returns an awaitable. The card is serialized when send_async is
+        called, so it may be modified again before the send completes.
+
+        connector_url -- The webhook URL to post the card to.
+        connector -- msteams.aio.AsyncConnector to send through. Defaults to
+                     a shared AsyncConnector for the running event loop.
+        """
+        from . import aio
+
+        return aio.send(connector_url, self.to_bytes(), connector)
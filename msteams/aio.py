@@ -0,0 +1,345 @@
+"""Asyncio transport for sending payloads to webhook connectors.
+
+:class:`AsyncConnector` is the asyncio counterpart of
+:class:`msteams.transport.Connector`. It speaks HTTP/1.1 directly on top of
+asyncio streams, so it needs nothing outside the standard library. Requires
+Python 3.5 or later.
+"""
+
+import asyncio
+import email.parser
+import http.client
+import io
+import ssl
+from timeit import default_timer as _timer
+from urllib.parse import urlsplit
+
+from .transport import (
+    _DEFAULT_PORTS,
+    _SEND_ERRORS,
+    DEFAULT_HEADERS,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_TIMEOUT,
+    HTTPError,
+    Response,
+    URLError,
+    _payload_bytes,
+    _send_result,
+)
+
+DEFAULT_LIMIT = 100
+
+_MAX_LINE = 65536
+_MAX_HEADERS = 100
+
+
+def _parse_headers(text):
+    """Parse a header block into a http.client.HTTPMessage."""
+    return email.parser.Parser(_class=http.client.HTTPMessage).parsestr(text)
+
+
+class _StaleConnection(Exception):
+    """Raised when a pooled connection was closed before the response."""
+
+
+class _Connection(object):
+    """A single HTTP/1.1 connection."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def closed(self):
+        return self.reader.at_eof() or self.writer.transport.is_closing()
+
+    def close(self):
+        self.writer.close()
+
+    async def _readline(self):
+        line = await self.reader.readline()
+        if len(line) > _MAX_LINE:
+            raise http.client.LineTooLong("header line")
+        return line
+
+    async def _read_headers(self):
+        lines = []
+        while True:
+            line = await self._readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            lines.append(line)
+            if len(lines) > _MAX_HEADERS:
+                raise http.client.HTTPException("got more than 100 headers")
+        text = b"".join(lines).decode("iso-8859-1")
+        return _parse_headers(text)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            line = await self._readline()
+            size = int(line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                break
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+        # Skip trailers
+        await self._read_headers()
+        return b"".join(chunks)
+
+    async def request(self, target, host, data, headers):
+        """Send a POST request and return (status, reason, headers, body, keep)."""
+        lines = ["POST {} HTTP/1.1".format(target), "Host: {}".format(host)]
+        lines.extend("{}: {}".format(k, v) for k, v in headers.items())
+        lines.append("Content-Length: {}".format(len(data)))
+        head = "\r\n".join(lines) + "\r\n\r\n"
+        self.writer.write(head.encode("latin-1") + data)
+        await self.writer.drain()
+
+        while True:
+            line = await self._readline()
+            if not line:
+                raise _StaleConnection()
+            try:
+                version, status, reason = line.decode("iso-8859-1").split(" ", 2)
+            except ValueError:
+                version, status = line.decode("iso-8859-1").split(" ", 1)
+                reason = ""
+            status = int(status)
+            resp_headers = await self._read_headers()
+            if status != 100:
+                break
+
+        conn_header = (resp_headers.get("Connection") or "").lower()
+        keep_alive = conn_header != "close" and (
+            version.strip() != "HTTP/1.0" or conn_header == "keep-alive"
+        )
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif (resp_headers.get("Transfer-Encoding") or "").lower() == "chunked":
+            body = await self._read_chunked()
+        elif resp_headers.get("Content-Length") is not None:
+            body = await self.reader.readexactly(int(resp_headers["Content-Length"]))
+        else:
+            body = await self.reader.read()
+            keep_alive = False
+
+        return status, reason.strip(), resp_headers, body, keep_alive
+
+
+class AsyncConnector(object):
+    """Asyncio HTTP(S) client with a pool of persistent connections.
+
+    limit          -- Maximum number of concurrent requests in total.
+    limit_per_host -- Maximum number of concurrent requests per host.
+    timeout        -- Timeout in seconds for a complete request.
+    maxsize        -- Maximum number of idle connections kept per host.
+    context        -- ssl.SSLContext used for https connections.
+    headers        -- Extra headers sent with every request.
+
+    A connector must only be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        limit=DEFAULT_LIMIT,
+        limit_per_host=DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        maxsize=DEFAULT_POOL_SIZE,
+        context=None,
+        headers=None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.context = context
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers is not None:
+            self.headers.update(headers)
+
+        self._pools = {}
+        self._semaphore = None
+        self._host_semaphores = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def _new_connection(self, scheme, host, port):
+        """Open a new connection to host."""
+        context = None
+        if scheme == "https":
+            if self.context is None:
+                self.context = ssl.create_default_context()
+            context = self.context
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        return _Connection(reader, writer)
+
+    def _acquire(self, key):
+        """Return an idle connection for key, or None if there is none."""
+        pool = self._pools.get(key)
+        while pool:
+            conn = pool.pop()
+            if not conn.closed:
+                return conn
+            conn.close()
+        return None
+
+    def _release(self, key, conn):
+        """Return connection to the pool, or close it if the pool is full."""
+        pool = self._pools.setdefault(key, [])
+        if len(pool) < self.maxsize:
+            pool.append(conn)
+        else:
+            conn.close()
+
+    async def _request(self, key, target, host_header, data, headers):
+        scheme, host, port = key
+        conn = self._acquire(key)
+        if conn is not None:
+            try:
+                result = await conn.request(target, host_header, data, headers)
+            except (_StaleConnection, ConnectionError):
+                # The pooled connection was closed while idle, retry once on
+                # a fresh connection.
+                conn.close()
+                conn = None
+            except BaseException:
+                conn.close()
+                raise
+        if conn is None:
+            conn = await self._new_connection(scheme, host, port)
+            try:
+                result = await conn.request(target, host_header, data, headers)
+            except _StaleConnection:
+                conn.close()
+                raise ConnectionError("Connection closed without response")
+            except BaseException:
+                conn.close()
+                raise
+        if result[-1]:
+            self._release(key, conn)
+        else:
+            conn.close()
+        return result[:-1]
+
+    async def send(self, connector_url, data, headers=None):
+        """POST data to connector_url and return a Response.
+
+        Raises HTTPError for non 2xx responses and URLError if the connector
+        could not be reached, just like Connector.send.
+        """
+        parts = urlsplit(connector_url)
+        scheme = parts.scheme.lower()
+        if scheme not in _DEFAULT_PORTS:
+            raise ValueError("Unsupported URL scheme {}".format(parts.scheme))
+        host = parts.hostname
+        port = parts.port or _DEFAULT_PORTS[scheme]
+        key = (scheme, host, port)
+
+        host_header = host
+        if ":" in host:
+            host_header = "[{}]".format(host)
+        if parts.port is not None:
+            host_header += ":{}".format(port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        req_headers = self.headers
+        if headers is not None:
+            req_headers = dict(self.headers)
+            req_headers.update(headers)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        host_semaphore = self._host_semaphores.get(key)
+        if host_semaphore is None:
+            host_semaphore = asyncio.Semaphore(self.limit_per_host)
+            self._host_semaphores[key] = host_semaphore
+
+        async with self._semaphore, host_semaphore:
+            try:
+                status, reason, resp_headers, body = await asyncio.wait_for(
+                    self._request(key, target, host_header, data, req_headers),
+                    self.timeout,
+                )
+            except (
+                OSError,
+                ValueError,
+                asyncio.IncompleteReadError,
+                http.client.HTTPException,
+            ) as e:
+                raise URLError(e)
+            except asyncio.TimeoutError:
+                raise URLError("timed out")
+
+        if not 200 <= status < 300:
+            raise HTTPError(
+                connector_url, status, reason, resp_headers, io.BytesIO(body)
+            )
+        return Response(connector_url, status, reason, resp_headers, body)
+
+    def close(self):
+        """Close all idle connections."""
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+
+
+_default_connectors = {}
+
+
+def default_connector():
+    """Return the shared AsyncConnector of the running event loop.
+
+    The shared connectors keep no idle connections, since they could not be
+    closed before their event loop is, and the connectors of closed event
+    loops are dropped. Use an AsyncConnector, and close it, to reuse
+    connections.
+    """
+    loop = asyncio.get_event_loop()
+    connector = _default_connectors.get(loop)
+    if connector is None:
+        for other in list(_default_connectors):
+            if other.is_closed():
+                _default_connectors.pop(other, None)
+        connector = _default_connectors[loop] = AsyncConnector(maxsize=0)
+    return connector
+
+
+async def send(connector_url, data, connector=None):
+    """POST data to connector_url, using the default connector if needed."""
+    if connector is None:
+        connector = default_connector()
+    return await connector.send(connector_url, data)
+
+
+async def _timed_send(connector, connector_url, data):
+    """Send data and return a SendResult instead of raising."""
+    start = _timer()
+    try:
+        resp = await connector.send(connector_url, data)
+    except _SEND_ERRORS as e:
+        return _send_result(connector_url, start, error=e)
+    return _send_result(connector_url, start, resp)
+
+
+async def send_many(card, connector_urls, connector=None):
+    """Send one card to many connector URLs concurrently.
+
+    The card is serialized once. Concurrency is bounded by the limits of the
+    connector. Returns a list of SendResults in the same order as
+    connector_urls.
+    """
+    data = _payload_bytes(card)
+    if connector is None:
+        connector = default_connector()
+    return await asyncio.gather(
+        *[_timed_send(connector, url, data) for url in connector_urls]
+    )
@@ -0,0 +1,257 @@
+"""Command line sender for streams of cards.
+
+Reads newline-delimited json from a file or stdin and sends each line to
+one or more webhook connectors, so that log shippers and scripts can pipe
+events to Teams through a single long running process::
+
+    tail -F alerts.jsonl | msteams --url https://... --rate 4
+    msteams --url https://... --template alert.json variables.jsonl
+
+Each line is either a complete card payload, which is sent as it is, or
+with --template a json object with the values for the placeholders of a
+CardTemplate. A summary of the throughput and latencies is printed to
+stderr when the input ends.
+"""
+
+import argparse
+import io
+import json
+import sys
+import threading
+from timeit import default_timer as _timer
+
+from . import CardObject, CardTemplate
+from .dispatch import (
+    DEFAULT_BACKOFF,
+    DEFAULT_BURST,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE,
+    DEFAULT_WORKERS,
+    Dispatcher,
+)
+from .workers import ProcessDispatcher
+
+DEFAULT_WINDOW = 1000
+
+
+class _Progress(object):
+    """Count the results of the sends, and bound the cards in flight."""
+
+    def __init__(self, window):
+        self.window = window
+        self.latencies = []
+        self._inflight = 0
+        self._cond = threading.Condition()
+
+    def start(self):
+        """Wait until there is room for another card in flight."""
+        with self._cond:
+            while self._inflight >= self.window:
+                self._cond.wait()
+            self._inflight += 1
+
+    def cancel(self):
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    def __call__(self, result):
+        with self._cond:
+            self._inflight -= 1
+            self.latencies.append(result.latency)
+            self._cond.notify_all()
+
+
+def _payloads(lines, template):
+    """Yield (line number, payload bytes, error) for each non-empty line.
+
+    Either the payload or the error is None.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            values = json.loads(line)
+            if not isinstance(values, dict):
+                raise ValueError("Expected a json object")
+        except ValueError as e:
+            yield number, None, e
+            continue
+        if template is None:
+            yield number, line.encode("utf-8"), None
+            continue
+        try:
+            data = template.render_bytes(**values)
+        except KeyError as e:
+            yield number, None, "Missing value for {}".format(e)
+        except (ValueError, TypeError, IndexError, AttributeError) as e:
+            # Values not fitting their placeholders, like null for {load:.1f}
+            yield number, None, "Invalid values: {}".format(e)
+        else:
+            yield number, data, None
+
+
+def _summary(stats, progress, elapsed):
+    """Return the lines of the summary printed when done."""
+    latencies = sorted(progress.latencies)
+    lines = [
+        "sent: {}, failed: {}, retried: {}, dropped: {}".format(
+            stats.sent, stats.failed, stats.retried, stats.dropped
+        ),
+        "elapsed: {:.3f} s, throughput: {:.1f} cards/s".format(
+            elapsed, len(latencies) / elapsed if elapsed > 0 else 0
+        ),
+    ]
+    if latencies:
+        lines.append(
+            "latency: mean {:.1f} ms, p50 {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms".format(
+                1000 * sum(latencies) / len(latencies),
+                1000 * latencies[len(latencies) // 2],
+                1000 * latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)],
+                1000 * latencies[-1],
+            )
+        )
+    return lines
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog="msteams",
+        description="Send newline-delimited json cards to Teams webhooks.",
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="File with one card payload or template values per line. "
+        "Defaults to stdin.",
+    )
+    parser.add_argument(
+        "--url",
+        action="append",
+        required=True,
+        help="Webhook URL to send each card to. Can be given multiple times.",
+    )
+    parser.add_argument(
+        "--template",
+        help="File with a card payload with {name} placeholders. Each input "
+        "line is then a json object with the values.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of concurrent sends.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="Send from this many worker processes instead of threads. Cards "
+        "to the same URL are then delivered in order.",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help="Sustained sends per second per URL.",
+    )
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=DEFAULT_BURST,
+        help="Sends per URL allowed in a burst.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help="Retries for throttled or failed sends.",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=DEFAULT_BACKOFF,
+        help="Base delay in seconds between retries.",
+    )
+    parser.add_argument(
+        "--max-backoff",
+        type=float,
+        default=DEFAULT_MAX_BACKOFF,
+        help="Maximum delay in seconds between retries.",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=DEFAULT_WINDOW,
+        help="Maximum number of cards read ahead of the sends.",
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Do not print the summary."
+    )
+    return parser
+
+
+def main(argv=None):
+    """Run the command line sender and return the exit status.
+
+    The exit status is 1 if any line was invalid or any card failed.
+    """
+    args = _parser().parse_args(argv)
+
+    template = None
+    if args.template is not None:
+        with io.open(args.template, encoding="utf-8") as f:
+            template = CardTemplate(CardObject.from_json(f.read()))
+
+    progress = _Progress(args.window)
+    options = dict(
+        rate=args.rate,
+        burst=args.burst,
+        max_queue=args.window * len(args.url),
+        max_retries=args.retries,
+        backoff=args.backoff,
+        max_backoff=args.max_backoff,
+        callback=progress,
+    )
+    if args.processes:
+        dispatcher = ProcessDispatcher(
+            processes=args.processes, threads=args.concurrency, **options
+        )
+    else:
+        dispatcher = Dispatcher(workers=args.concurrency, **options)
+
+    if args.input == "-":
+        lines = sys.stdin
+    else:
+        lines = io.open(args.input, encoding="utf-8")
+
+    invalid = 0
+    start = _timer()
+    try:
+        for number, data, error in _payloads(lines, template):
+            if error is not None:
+                invalid += 1
+                sys.stderr.write("line {}: {}\n".format(number, error))
+                continue
+            for url in args.url:
+                progress.start()
+                if not dispatcher.submit(data, url):
+                    progress.cancel()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        dispatcher.close()
+    elapsed = _timer() - start
+
+    stats = dispatcher.stats
+    if not args.quiet:
+        lines = _summary(stats, progress, elapsed)
+        if invalid:
+            lines.append("invalid lines: {}".format(invalid))
+        sys.stderr.write("\n".join(lines) + "\n")
+    return 1 if invalid or stats.failed or stats.dropped else 0
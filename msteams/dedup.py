@@ -0,0 +1,119 @@
+"""Suppression of identical cards sent repeatedly to the same connector.
+
+A :class:`Deduplicator` sits in front of a sender, like
+:meth:`msteams.Dispatcher.submit`, and drops a card if an identical payload
+was sent to the same connector URL within a time window. Cards are compared
+by the digest of their serialized payload, which card objects cache.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from timeit import default_timer as _timer
+
+DEFAULT_TTL = 300.0
+DEFAULT_MAXSIZE = 10000
+
+DedupStats = namedtuple("DedupStats", ("entries", "passed", "suppressed"))
+
+
+def _digest(card):
+    """Return the payload digest of a card object or serialized payload."""
+    if isinstance(card, bytes):
+        return hashlib.sha1(card).hexdigest()
+    return card.digest()
+
+
+class Deduplicator(object):
+    """Drop cards that were already sent to the same connector recently.
+
+    sender  -- Callable taking (card, connector_url) that sends a card, for
+               example Dispatcher.submit. Only needed for submit.
+    ttl     -- Seconds after a card was sent during which identical cards to
+               the same connector URL are suppressed.
+    maxsize -- Maximum number of remembered cards. The ones sent longest ago
+               are forgotten first.
+
+    >>> from msteams import MessageCard
+    >>> dedup = Deduplicator(ttl=60)
+    >>> card = MessageCard(title="Disk full")
+    >>> dedup.check(card, "https://a"), dedup.check(card, "https://a")
+    (False, True)
+    >>> dedup.stats
+    DedupStats(entries=1, passed=1, suppressed=1)
+    """
+
+    def __init__(self, sender=None, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE):
+        self.sender = sender
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+        # (connector URL, digest) -> [expiry time, suppressed count], in
+        # order of expiry.
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._passed = 0
+        self._suppressed = 0
+
+    @property
+    def stats(self):
+        """Snapshot of the number of entries, passed and suppressed cards."""
+        with self._lock:
+            return DedupStats(len(self._entries), self._passed, self._suppressed)
+
+    def _expire(self, now):
+        """Forget entries that have expired. Must hold self._lock."""
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if entry[0] > now:
+                break
+            del entries[key]
+
+    def check(self, card, connector_url):
+        """Check if card is a duplicate, and remember it if it is not.
+
+        Returns True if an identical card was passed for connector_url
+        within the ttl, and counts it as suppressed. Otherwise the card is
+        counted as passed, and identical cards are suppressed from now on.
+        """
+        key = (connector_url, _digest(card))
+        now = _timer()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] += 1
+                self._suppressed += 1
+                return True
+            self._entries[key] = [now + self.ttl, 0]
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._passed += 1
+            return False
+
+    def suppressed_count(self, card, connector_url):
+        """Return how many copies of card to connector_url were suppressed.
+
+        Counts since the card was last passed, and 0 if it is not remembered.
+        """
+        key = (connector_url, _digest(card))
+        with self._lock:
+            self._expire(_timer())
+            entry = self._entries.get(key)
+            return 0 if entry is None else entry[1]
+
+    def submit(self, card, connector_url):
+        """Send card with the sender unless it is a duplicate.
+
+        Returns False if the card was suppressed, and otherwise what the
+        sender returned.
+        """
+        if self.check(card, connector_url):
+            return False
+        return self.sender(card, connector_url)
+
+    def clear(self):
+        """Forget all remembered cards."""
+        with self._lock:
+            self._entries.clear()
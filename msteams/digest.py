@@ -0,0 +1,273 @@
+"""Coalescing of many cards into digest cards.
+
+A :class:`DigestAggregator` buffers the cards added for each connector URL
+for a time window, or until a number of cards have been added, and then
+sends them merged into a single digest card. This cuts the number of
+requests during bursts of alerts, which would otherwise get throttled.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from timeit import default_timer as _timer
+
+from . import MAX_PAYLOAD_SIZE, CardSection, FactColumns, MessageCard, RawFragment
+from .dispatch import Dispatcher
+
+DEFAULT_WINDOW = 60.0
+DEFAULT_MAX_CARDS = 100
+DEFAULT_TITLE = "{count} notifications"
+
+_log = logging.getLogger(__name__)
+
+
+def _as_card(card):
+    """Return a card object, frozen or serialized, as one that can be read."""
+    if isinstance(card, RawFragment):
+        return card.thaw()
+    if isinstance(card, bytes):
+        return MessageCard.from_json(card)
+    return card
+
+
+def _field(obj, name, default=None):
+    """Return a field of obj, creating any objects loaded lazily."""
+    return obj[name] if name in obj._attrs else default
+
+
+def _card_title(card):
+    attrs = card._attrs
+    return attrs.get("title") or attrs.get("summary") or ""
+
+
+def _alert_section(card):
+    """Return a section with the title, texts, facts and actions of card."""
+    section = CardSection(activity_title=_card_title(card), start_group=True)
+    texts = []
+    if "text" in card._attrs:
+        texts.append(card["text"])
+    actions = list(_field(card, "potential_action", []))
+    for s in _field(card, "sections", []):
+        s = _as_card(s)
+        if "text" in s._attrs:
+            texts.append(s["text"])
+        if "facts" in s._attrs:
+            section.add_facts(s["facts"])
+        actions.extend(_field(s, "potential_action", []))
+    if texts:
+        section.set_text("\n\n".join(texts))
+    if actions:
+        section["potential_action"] = actions
+    return section
+
+
+class DigestAggregator(object):
+    """Buffer cards per connector URL and send them merged into one card.
+
+    window     -- Seconds to buffer the cards of a connector URL, counted
+                  from the first card added.
+    max_cards  -- Send as soon as this many cards are buffered.
+    key        -- Callable returning a group key for a card. If given, the
+                  cards with the same key are merged into one section with
+                  a fact with the title and texts of each card, followed by
+                  its facts, and with the actions of the cards, instead of
+                  one section per card.
+    title      -- Title of the digest cards, formatted with count.
+    max_bytes  -- Digests larger than this are split, see MessageCard.split.
+    dispatcher -- Dispatcher that sends the digests. Defaults to a new
+                  Dispatcher, which is closed with the aggregator.
+
+    >>> aggregator = DigestAggregator()
+    >>> digest = aggregator.merge([MessageCard(title="Disk full"),
+    ...                            MessageCard(title="CPU high")])
+    >>> digest["title"], [s["activity_title"] for s in digest["sections"]]
+    ('2 notifications', ['Disk full', 'CPU high'])
+    >>> aggregator.close()
+    """
+
+    def __init__(
+        self,
+        window=DEFAULT_WINDOW,
+        max_cards=DEFAULT_MAX_CARDS,
+        key=None,
+        title=DEFAULT_TITLE,
+        max_bytes=MAX_PAYLOAD_SIZE,
+        dispatcher=None,
+    ):
+        self.window = window
+        self.max_cards = max_cards
+        self.key = key
+        self.title = title
+        self.max_bytes = max_bytes
+        self._own_dispatcher = dispatcher is None
+        self.dispatcher = Dispatcher() if dispatcher is None else dispatcher
+
+        # connector URL -> [flush time, cards]
+        self._buffers = OrderedDict()
+        # Full batches waiting to be sent, as (connector URL, cards)
+        self._full = []
+        # Number of batches taken by the thread that are being sent
+        self._sending = 0
+        self._failed = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def pending(self):
+        """Number of buffered cards."""
+        with self._cond:
+            buffers = [b[1] for b in self._buffers.values()]
+            return sum(len(c) for c in buffers + [f[1] for f in self._full])
+
+    @property
+    def failed(self):
+        """Number of cards in digests that could not be created or sent."""
+        with self._cond:
+            return self._failed
+
+    def add(self, card, connector_url):
+        """Buffer card for the next digest sent to connector_url.
+
+        card may be a MessageCard, a frozen one or its serialized payload,
+        which is parsed right away, so invalid payloads raise ValueError or
+        TypeError here. Returns False if the aggregator is closed.
+        """
+        card = _as_card(card)
+        with self._cond:
+            if self._closed:
+                return False
+            buffer = self._buffers.get(connector_url)
+            if buffer is None:
+                buffer = self._buffers[connector_url] = [_timer() + self.window, []]
+                self._cond.notify_all()
+            buffer[1].append(card)
+            if len(buffer[1]) >= self.max_cards:
+                self._full.append((connector_url, self._buffers.pop(connector_url)[1]))
+                self._cond.notify_all()
+        return True
+
+    def merge(self, cards):
+        """Return a digest MessageCard with the content of cards."""
+        cards = [_as_card(c) for c in cards]
+        digest = MessageCard(title=self.title.format(count=len(cards)))
+        digest.set_summary(digest["title"])
+        colors = set(c._attrs.get("theme_color") for c in cards)
+        if len(colors) == 1 and None not in colors:
+            digest.set_theme_color(colors.pop())
+
+        if self.key is None:
+            digest.set_sections([_alert_section(c) for c in cards])
+            return digest
+
+        groups = OrderedDict()
+        for card in cards:
+            groups.setdefault(self.key(card), []).append(card)
+        sections = []
+        for key, group in groups.items():
+            section = CardSection(
+                activity_title="{} ({})".format(key, len(group)), start_group=True
+            )
+            names, values, actions = [], [], []
+            for card in group:
+                alert = _alert_section(card)
+                names.append(alert["activity_title"])
+                values.append(alert._attrs.get("text", ""))
+                for fact in alert._attrs.get("facts", ()):
+                    names.append(fact["name"])
+                    values.append(fact["value"])
+                actions.extend(alert._attrs.get("potential_action", ()))
+            section.set_facts(FactColumns(names, values))
+            if actions:
+                section["potential_action"] = actions
+            sections.append(section)
+        digest.set_sections(sections)
+        return digest
+
+    def _send(self, connector_url, cards):
+        """Merge and submit cards, counting them as failed on errors.
+
+        The cards are also counted as failed if the dispatcher refuses any
+        card of the digest, because its queue is full or it is closed.
+        """
+        try:
+            refused = 0
+            for card in self.merge(cards).split(self.max_bytes):
+                if not self.dispatcher.submit(card, connector_url):
+                    refused += 1
+            if refused:
+                _log.warning(
+                    "Dispatcher refused %d cards of a digest of %d cards",
+                    refused,
+                    len(cards),
+                )
+                with self._cond:
+                    self._failed += len(cards)
+        except Exception:
+            # Keep the aggregator running for the following digests
+            _log.exception("Digest of %d cards failed", len(cards))
+            with self._cond:
+                self._failed += len(cards)
+
+    def _take(self, everything=False):
+        """Remove and return the buffers that are due. Must hold self._cond."""
+        now = _timer()
+        due = [u for u, b in self._buffers.items() if everything or b[0] <= now]
+        batches, self._full = self._full, []
+        return batches + [(u, self._buffers.pop(u)[1]) for u in due]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batches = self._take()
+                while not batches and not self._closed:
+                    timeout = None
+                    if self._buffers:
+                        timeout = min(b[0] for b in self._buffers.values()) - _timer()
+                    self._cond.wait(timeout)
+                    batches = self._take()
+                if not batches:
+                    return
+                self._sending += 1
+            try:
+                for connector_url, cards in batches:
+                    self._send(connector_url, cards)
+            finally:
+                with self._cond:
+                    self._sending -= 1
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Send all buffered cards now.
+
+        Returns when all cards added before have been handed to the
+        dispatcher, also the ones that were already being sent.
+        """
+        with self._cond:
+            batches = self._take(everything=True)
+        for connector_url, cards in batches:
+            self._send(connector_url, cards)
+        with self._cond:
+            while self._sending:
+                self._cond.wait()
+
+    def close(self, timeout=None):
+        """Stop accepting cards, send the buffered ones and stop.
+
+        Also closes the dispatcher if it was created by the aggregator.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self.flush()
+        if self._own_dispatcher:
+            self.dispatcher.close(timeout)
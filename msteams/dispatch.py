@@ -0,0 +1,322 @@
+"""Background dispatch of cards with per-connector rate limiting.
+
+A :class:`Dispatcher` queues cards and sends them from background threads.
+Each connector URL gets its own :class:`TokenBucket`, throttled connectors
+(HTTP 429) are paused for as long as their ``Retry-After`` header asks, and
+failed sends are retried with jittered exponential backoff. Submitting never
+blocks: when the queue is full the card is dropped and counted.
+"""
+
+import email.utils
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import namedtuple
+from timeit import default_timer as _timer
+
+from .transport import (
+    HTTPError,
+    SendResult,
+    URLError,
+    _payload_bytes,
+    default_connector,
+)
+
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Fallback to python 2
+    import Queue as queue
+
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 4
+DEFAULT_MAX_QUEUE = 10000
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+DEFAULT_WORKERS = 4
+
+_log = logging.getLogger(__name__)
+
+DispatchStats = namedtuple(
+    "DispatchStats", ("queue_depth", "sent", "failed", "retried", "dropped")
+)
+
+
+class TokenBucket(object):
+    """Token bucket rate limiter.
+
+    rate     -- Tokens added per second.
+    capacity -- Maximum number of tokens, i.e. the allowed burst.
+
+    >>> bucket = TokenBucket(rate=1, capacity=2, now=0)
+    >>> bucket.take(now=0), bucket.take(now=0), bucket.take(now=0)
+    (0, 0, 1.0)
+    >>> bucket.take(now=1)
+    0
+    """
+
+    def __init__(self, rate, capacity=1, now=None):
+        self.rate = float(rate)
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = _timer() if now is None else now
+        self._blocked_until = self._last
+        self._lock = threading.Lock()
+
+    def take(self, now=None):
+        """Take a token if there is one.
+
+        Returns 0 if a token was taken, otherwise the number of seconds until
+        the next token is available.
+        """
+        if now is None:
+            now = _timer()
+        with self._lock:
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            elapsed = max(0, now - max(self._last, self._blocked_until))
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def block(self, until):
+        """Hand out no tokens before until, and start refilling from empty."""
+        with self._lock:
+            if until > self._blocked_until:
+                self._blocked_until = until
+                self._tokens = 0.0
+
+
+def _retry_after(error):
+    """Return the Retry-After delay in seconds from an HTTPError, if any."""
+    # hdrs is set on python 2 as well, also when the error has no body
+    headers = getattr(error, "hdrs", None)
+    value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(date) - time.time())
+
+
+class Dispatcher(object):
+    """Queue cards and send them from background threads.
+
+    connector   -- Connector to send through. Defaults to the shared one.
+    rate        -- Sustained sends per second allowed per connector URL.
+    burst       -- Number of sends per connector URL allowed in a burst.
+    max_queue   -- Maximum number of queued cards before new ones are dropped.
+    max_retries -- Number of retries for throttled or failed sends.
+    backoff     -- Base delay in seconds for the exponential backoff.
+    max_backoff -- Maximum delay in seconds between retries.
+    workers     -- Number of sender threads.
+    callback    -- Called with a SendResult when a card is sent or given up.
+
+    >>> with Dispatcher() as dispatcher:
+    ...     dispatcher.stats
+    DispatchStats(queue_depth=0, sent=0, failed=0, retried=0, dropped=0)
+    """
+
+    def __init__(
+        self,
+        connector=None,
+        rate=DEFAULT_RATE,
+        burst=DEFAULT_BURST,
+        max_queue=DEFAULT_MAX_QUEUE,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        workers=DEFAULT_WORKERS,
+        callback=None,
+    ):
+        self.connector = connector if connector is not None else default_connector()
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.callback = callback
+
+        self._buckets = {}
+        self._heap = []
+        self._seq = itertools.count()
+        self._ready = queue.Queue()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._pending = 0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._dropped = 0
+
+        self._threads = [threading.Thread(target=self._schedule)]
+        self._threads += [threading.Thread(target=self._work) for _ in range(workers)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def queue_depth(self):
+        """Number of cards waiting to be sent or retried."""
+        return self._pending
+
+    @property
+    def stats(self):
+        """Snapshot of the dispatcher counters."""
+        with self._cond:
+            return DispatchStats(
+                self._pending, self._sent, self._failed, self._retried, self._dropped
+            )
+
+    def submit(self, card, connector_url, callback=None):
+        """Queue card for sending to connector_url without blocking.
+
+        card may be a MessageCard or an already serialized payload. The card
+        is serialized immediately. Returns False if the card was dropped
+        because the queue is full or the dispatcher is closed.
+
+        callback -- Called with the SendResult of this card, in addition to
+                    the callback of the dispatcher.
+        """
+        data = _payload_bytes(card)
+        with self._cond:
+            if self._closed or self._pending >= self.max_queue:
+                self._dropped += 1
+                return False
+            self._pending += 1
+            self._push(_timer(), [data, connector_url, 0, callback])
+        return True
+
+    def _push(self, when, job):
+        """Schedule job to be sent at when. Must hold self._cond."""
+        heapq.heappush(self._heap, (when, next(self._seq), job))
+        self._cond.notify_all()
+
+    def _bucket(self, connector_url):
+        bucket = self._buckets.get(connector_url)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[connector_url] = bucket
+        return bucket
+
+    def _schedule(self):
+        """Move due jobs to the worker queue once their bucket allows it."""
+        with self._cond:
+            while True:
+                if not self._heap:
+                    if self._closed and not self._pending:
+                        break
+                    self._cond.wait()
+                    continue
+                now = _timer()
+                when, _, job = self._heap[0]
+                if when > now:
+                    self._cond.wait(when - now)
+                    continue
+                heapq.heappop(self._heap)
+                delay = self._bucket(job[1]).take(now)
+                if delay:
+                    self._push(now + delay, job)
+                else:
+                    self._ready.put(job)
+        for _ in self._threads[1:]:
+            self._ready.put(None)
+
+    def _delay(self, attempt, error):
+        """Return seconds to wait before retry number attempt."""
+        jitter = random.uniform(0, self.backoff)
+        if isinstance(error, HTTPError) and error.code == 429:
+            retry_after = _retry_after(error)
+            if retry_after is not None:
+                return retry_after + jitter
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+
+    def _work(self):
+        while True:
+            job = self._ready.get()
+            if job is None:
+                return
+            data, connector_url, attempt, callback = job
+            start = _timer()
+            status = error = None
+            retryable = False
+            try:
+                status = self.connector.send(connector_url, data).status
+            except HTTPError as e:
+                status, error = e.code, e
+                retryable = status == 429 or status >= 500
+            except URLError as e:
+                error, retryable = e, True
+            except Exception as e:
+                error = e
+            now = _timer()
+
+            with self._cond:
+                if retryable and attempt < self.max_retries:
+                    job[2] = attempt = attempt + 1
+                    delay = self._delay(attempt, error)
+                    if status == 429:
+                        self._bucket(connector_url).block(now + delay)
+                    self._retried += 1
+                    self._push(now + delay, job)
+                    continue
+                self._pending -= 1
+                if error is None:
+                    self._sent += 1
+                else:
+                    self._failed += 1
+                self._cond.notify_all()
+            result = SendResult(connector_url, status, now - start, error)
+            for func in (self.callback, callback):
+                if func is None:
+                    continue
+                try:
+                    func(result)
+                except Exception:
+                    # Keep the worker alive for the remaining cards
+                    _log.exception("Dispatcher callback failed")
+
+    def join(self, timeout=None):
+        """Wait until all queued cards are sent or given up.
+
+        Returns False if the timeout expired first.
+        """
+        deadline = None if timeout is None else _timer() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - _timer()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Stop accepting cards, wait for the queue to drain and stop."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.join(timeout)
+        for thread in self._threads:
+            thread.join(timeout)
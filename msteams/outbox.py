@@ -0,0 +1,525 @@
+"""Durable on-disk outbox for cards that must survive a crash.
+
+An :class:`Outbox` appends the serialized payload and connector URL of each
+card to segment files in a directory, and only returns once the record is
+on disk. Concurrent appends share a single fsync. An :class:`OutboxSender`
+drains the outbox through a :class:`msteams.Dispatcher` and commits the
+offset of the sent records, so that after a restart only the cards that were
+not sent yet are replayed, straight from the stored bytes.
+
+Delivery is at least once: cards sent after the last committed offset are
+sent again after a crash.
+
+Each record is stored as a header with the CRC32 checksum of the record and
+the lengths of the URL and payload, followed by the UTF-8 encoded URL and
+the payload. Records are addressed by their byte offset in the whole
+outbox, and segment files are named after the offset of their first record.
+"""
+
+import errno
+import functools
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import deque, namedtuple
+from timeit import default_timer as _timer
+
+from .dispatch import Dispatcher
+from .transport import HTTPError, URLError, _payload_bytes
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+DEFAULT_WINDOW = 1000
+DEFAULT_COMMIT_INTERVAL = 0.1
+DEFAULT_RETRY_DELAY = 30.0
+
+_HEADER = struct.Struct("<III")
+_SUFFIX = ".seg"
+_OFFSET_FILE = "offset"
+
+_replace = getattr(os, "replace", os.rename)
+
+# A stored card. end is the offset of the next record.
+Record = namedtuple("Record", ("offset", "end", "connector_url", "data"))
+
+
+def _crc(head, url, data):
+    return zlib.crc32(data, zlib.crc32(url, zlib.crc32(head))) & 0xFFFFFFFF
+
+
+def _parse(buf, pos, size):
+    """Return (url, data, end) of the record at pos in buf, or None if the
+    record is incomplete or corrupt."""
+    end = pos + _HEADER.size
+    if end > size:
+        return None
+    crc, url_len, data_len = _HEADER.unpack(buf[pos:end])
+    url_end = end + url_len
+    data_end = url_end + data_len
+    if data_end > size:
+        return None
+    url = buf[end:url_end]
+    data = buf[url_end:data_end]
+    if crc != _crc(buf[pos + 4 : end], url, data):
+        return None
+    return url, data, data_end
+
+
+def _map(path, length):
+    """Return a read-only memory map of the first length bytes of path."""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ)
+
+
+def _sync_dir(directory):
+    """Make renames and new files in directory durable, where supported."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Outbox(object):
+    """Append-only store of cards waiting to be sent.
+
+    directory    -- Directory for the segment files, created if missing.
+    segment_size -- Start a new segment file once a segment reaches this
+                    many bytes. Sent segments are deleted as a whole.
+    sync         -- fsync appended records before append returns. Without
+                    it, records survive a crash of the process but not of
+                    the machine.
+
+    A record that was only partly written when the process died is discarded
+    when the outbox is opened again.
+
+    >>> import tempfile
+    >>> from msteams import MessageCard
+    >>> directory = tempfile.mkdtemp()
+    >>> with Outbox(directory) as outbox:
+    ...     end = outbox.append(MessageCard(title="Hello"), "https://a")
+    >>> with Outbox(directory) as outbox:
+    ...     for r in outbox.records():
+    ...         print("{} {}".format(r.offset, r.connector_url))
+    0 https://a
+    """
+
+    def __init__(self, directory, segment_size=DEFAULT_SEGMENT_SIZE, sync=True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sync = sync
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        self._cond = threading.Condition()
+        self._maps = {}
+        self._closed = False
+        self._syncing = False
+
+        self._committed = 0
+        try:
+            with open(os.path.join(directory, _OFFSET_FILE), "rb") as f:
+                self._committed = int(f.read().decode("ascii"))
+        except (IOError, OSError) as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+        self._bases = sorted(
+            int(name[: -len(_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.endswith(_SUFFIX)
+        )
+        if self._bases:
+            base = self._bases[-1]
+            path = self._path(base)
+            size = self._recover(path)
+            self._file = open(path, "ab")
+            self._end = base + size
+        else:
+            self._bases.append(self._committed)
+            self._file = open(self._path(self._committed), "ab")
+            self._end = self._committed
+            _sync_dir(directory)
+        self._size = self._end - self._bases[-1]
+        self._synced = self._end
+        self._delete_sent()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _path(self, base):
+        return os.path.join(self.directory, "{:020d}{}".format(base, _SUFFIX))
+
+    @staticmethod
+    def _recover(path):
+        """Truncate a partly written record at the end of a segment file.
+
+        Returns the size of the valid records.
+        """
+        size = os.path.getsize(path)
+        pos = 0
+        if size:
+            buf = _map(path, size)
+            try:
+                while True:
+                    record = _parse(buf, pos, size)
+                    if record is None:
+                        break
+                    pos = record[2]
+            finally:
+                buf.close()
+        if pos < size:
+            with open(path, "r+b") as f:
+                f.truncate(pos)
+                f.flush()
+                os.fsync(f.fileno())
+        return pos
+
+    @property
+    def committed(self):
+        """Offset of the first record that is not committed as sent."""
+        return self._committed
+
+    @property
+    def closed(self):
+        """True if the outbox is closed."""
+        return self._closed
+
+    @property
+    def end(self):
+        """Offset where the next record will be appended."""
+        return self._end
+
+    def append(self, card, connector_url):
+        """Store card for sending to connector_url.
+
+        card may be a card object or its serialized payload. Returns the
+        offset after the record, once it is written to disk.
+        """
+        data = _payload_bytes(card)
+        url = connector_url.encode("utf-8")
+        head = _HEADER.pack(0, len(url), len(data))[4:]
+        record = struct.pack("<I", _crc(head, url, data)) + head + url + data
+
+        with self._cond:
+            if self._closed:
+                raise ValueError("Outbox is closed")
+            if self._size and self._size + len(record) > self.segment_size:
+                self._rotate()
+            self._file.write(record)
+            self._file.flush()
+            self._size += len(record)
+            self._end = end = self._end + len(record)
+            self._cond.notify_all()
+            if self.sync:
+                self._wait_synced(end)
+        return end
+
+    def _wait_synced(self, end):
+        """Wait until end is on disk, syncing the pending appends of all
+        threads at once. Must hold self._cond."""
+        while self._synced < end:
+            if self._syncing:
+                self._cond.wait()
+                continue
+            self._syncing = True
+            target = self._end
+            fd = self._file.fileno()
+            self._cond.release()
+            try:
+                os.fsync(fd)
+            finally:
+                self._cond.acquire()
+                self._syncing = False
+                self._cond.notify_all()
+            self._synced = max(self._synced, target)
+
+    def _rotate(self):
+        """Close the current segment and start a new one. Must hold
+        self._cond."""
+        while self._syncing:
+            self._cond.wait()
+        if self.sync:
+            os.fsync(self._file.fileno())
+            self._synced = self._end
+        self._file.close()
+        self._bases.append(self._end)
+        self._file = open(self._path(self._end), "ab")
+        self._size = 0
+        if self.sync:
+            _sync_dir(self.directory)
+
+    def _segment(self, offset):
+        """Return the index of the segment containing offset."""
+        bases = self._bases
+        i = len(bases) - 1
+        while i > 0 and bases[i] > offset:
+            i -= 1
+        return i
+
+    def _read(self, offset, end):
+        """Return the record at offset, where end is the end of the outbox."""
+        with self._cond:
+            i = self._segment(offset)
+            base = self._bases[i]
+            if i + 1 < len(self._bases):
+                size = self._bases[i + 1] - base
+            else:
+                size = end - base
+            buf = self._maps.get(base)
+            if buf is None or len(buf) < size:
+                if buf is not None:
+                    buf.close()
+                buf = self._maps[base] = _map(self._path(base), size)
+        record = _parse(buf, offset - base, size)
+        if record is None:
+            raise ValueError("Corrupt outbox record at offset {}".format(offset))
+        url, data, pos = record
+        return Record(offset, base + pos, url.decode("utf-8"), data)
+
+    def records(self, offset=None):
+        """Iterate over the stored records, from offset to the current end.
+
+        offset defaults to the committed offset.
+        """
+        if offset is None:
+            offset = self._committed
+        end = self._end
+        while offset < end:
+            record = self._read(offset, end)
+            yield record
+            offset = record.end
+
+    def wait(self, offset, timeout=None):
+        """Wait until a record is appended after offset.
+
+        Returns False if the timeout expired or the outbox was closed first.
+        """
+        deadline = None if timeout is None else _timer() + timeout
+        with self._cond:
+            while self._end <= offset and not self._closed:
+                remaining = None if deadline is None else deadline - _timer()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return self._end > offset
+
+    def commit(self, offset):
+        """Mark the records before offset as sent.
+
+        The offset is replaced atomically, and segments that only contain
+        sent records are deleted.
+        """
+        if offset <= self._committed:
+            return
+        path = os.path.join(self.directory, _OFFSET_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(str(offset).encode("ascii"))
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(tmp, path)
+        _sync_dir(self.directory)
+        with self._cond:
+            self._committed = max(self._committed, offset)
+            self._delete_sent()
+
+    def _delete_sent(self):
+        """Delete the segments before the committed offset. Must hold
+        self._cond, or be called before the outbox is shared."""
+        while len(self._bases) > 1 and self._bases[1] <= self._committed:
+            base = self._bases.pop(0)
+            buf = self._maps.pop(base, None)
+            if buf is not None:
+                buf.close()
+            os.remove(self._path(base))
+
+    def close(self):
+        """Sync and close the outbox."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            while self._syncing:
+                self._cond.wait()
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            for buf in self._maps.values():
+                buf.close()
+            self._maps.clear()
+            self._cond.notify_all()
+
+
+def _retryable(result):
+    """Check if a send was given up on an error that may go away."""
+    error = result.error
+    if isinstance(error, HTTPError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, URLError)
+
+
+class OutboxSender(object):
+    """Send the records of an outbox in the background.
+
+    Records are submitted to a Dispatcher, which rate limits and retries
+    them, and the offset of the records that were delivered or rejected by
+    the connector is committed in order. Records that the dispatcher gave up
+    on because of throttling, server or network errors are submitted again
+    after retry_delay, and hold back the commit until they are done. Records
+    left from a previous run are replayed first.
+
+    outbox          -- The Outbox to drain.
+    dispatcher      -- Dispatcher that sends the records. Defaults to a new
+                       Dispatcher, which is closed with the sender.
+    window          -- Maximum number of records submitted but not done.
+    commit_interval -- Minimum seconds between commits of the offset.
+    retry_delay     -- Seconds to wait before submitting a record again.
+    """
+
+    def __init__(
+        self,
+        outbox,
+        dispatcher=None,
+        window=DEFAULT_WINDOW,
+        commit_interval=DEFAULT_COMMIT_INTERVAL,
+        retry_delay=DEFAULT_RETRY_DELAY,
+    ):
+        self.outbox = outbox
+        self.window = window
+        self.commit_interval = commit_interval
+        self.retry_delay = retry_delay
+        self._own_dispatcher = dispatcher is None
+        self.dispatcher = Dispatcher() if dispatcher is None else dispatcher
+
+        # [record, done] of the submitted records, in order
+        self._inflight = deque()
+        # (time, entry) of the records to submit again
+        self._retry = deque()
+        self._done = outbox.committed
+        self._last_commit = _timer()
+        self._cond = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _submit(self, entry):
+        """Submit the record of entry, or schedule it again if refused."""
+        record = entry[0]
+        callback = functools.partial(self._finish, entry)
+        if not self.dispatcher.submit(record.data, record.connector_url, callback):
+            # The dispatcher is closed or full
+            with self._cond:
+                self._retry.append((_timer() + self.commit_interval, entry))
+
+    def _resubmit(self):
+        """Submit the records whose retry is due."""
+        now = _timer()
+        with self._cond:
+            due = []
+            for _ in range(len(self._retry)):
+                when, entry = self._retry.popleft()
+                if when <= now:
+                    due.append(entry)
+                else:
+                    self._retry.append((when, entry))
+        for entry in due:
+            self._submit(entry)
+
+    def _run(self):
+        offset = self.outbox.committed
+        records = iter(())
+        while True:
+            self._resubmit()
+            with self._cond:
+                if self._closed:
+                    return
+                if len(self._inflight) >= self.window:
+                    self._cond.wait(self.commit_interval)
+                    continue
+            record = next(records, None)
+            if record is None:
+                if (
+                    not self.outbox.wait(offset, self.commit_interval)
+                    and self.outbox.closed
+                ):
+                    return
+                records = self.outbox.records(offset)
+                continue
+            entry = [record, False]
+            with self._cond:
+                self._inflight.append(entry)
+            self._submit(entry)
+            offset = record.end
+
+    def _finish(self, entry, result):
+        with self._cond:
+            if _retryable(result):
+                self._retry.append((_timer() + self.retry_delay, entry))
+                return
+            entry[1] = True
+            inflight = self._inflight
+            while inflight and inflight[0][1]:
+                self._done = inflight.popleft()[0].end
+            self._cond.notify_all()
+            due = _timer() - self._last_commit >= self.commit_interval
+        if due:
+            self.commit()
+
+    def commit(self):
+        """Commit the offset of the records that are done."""
+        with self._commit_lock:
+            self._last_commit = _timer()
+            self.outbox.commit(self._done)
+
+    def join(self, timeout=None):
+        """Wait until all records appended so far are done and committed.
+
+        Returns False if the timeout expired first.
+        """
+        end = self.outbox.end
+        deadline = None if timeout is None else _timer() + timeout
+        with self._cond:
+            while self._done < end:
+                remaining = None if deadline is None else deadline - _timer()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        self.commit()
+        return True
+
+    def close(self, timeout=None):
+        """Stop submitting records, wait for the submitted ones and commit.
+
+        Records that were not submitted are replayed by the next sender.
+        Also closes the dispatcher if it was created by the sender.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._own_dispatcher:
+            self.dispatcher.close(timeout)
+        else:
+            self.dispatcher.join(timeout)
+        self.commit()
@@ -0,0 +1,113 @@
+"""Precompiled card templates.
+
+A :class:`CardTemplate` is made from a prototype card with ``{name}``
+placeholders in its string fields. The prototype is serialized once and
+split into static json fragments and placeholder slots, so rendering a card
+only escapes the values and joins the fragments, without building any card
+objects.
+"""
+
+import re
+import string
+
+from . import _encode_str, _string_types
+from .transport import default_connector
+
+# Matches the string literals of compact json
+_JSON_STRING = re.compile(r'"(?:[^"\\]|\\.)*"')
+_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_formatter = string.Formatter()
+
+
+class CardTemplate(object):
+    """Card with placeholders that can be rendered with different values.
+
+    Placeholders use the str.format syntax, like ``{name}`` or
+    ``{value:.1f}``, and literal braces are written as ``{{`` and ``}}``.
+    They can be used in any string field of the prototype card, and are
+    replaced by the value converted to a string.
+
+    prototype -- Card object with placeholders, usually a MessageCard.
+
+    >>> from msteams import CardSection, Fact, MessageCard
+    >>> card = MessageCard(title="{host} is down")
+    >>> card.add_section(CardSection(facts=[Fact("Load", "{load:.1f}")]))
+    >>> template = CardTemplate(card)
+    >>> template.fields
+    ('host', 'load')
+    >>> print(template.render(host="db1", load=2.25))  # doctest: +NORMALIZE_WHITESPACE
+    {"@type": "MessageCard", "@context": "https://schema.org/extensions",
+     "summary": "Summary", "title": "db1 is down",
+     "sections": [{"facts": [{"name": "Load", "value": "2.2"}]}]}
+    """
+
+    def __init__(self, prototype):
+        statics = []
+        slots = []
+        static = []
+        pos = 0
+        text = prototype.get_payload(fmt="json")
+        for match in _JSON_STRING.finditer(text):
+            static.append(text[pos : match.start()])
+            pos = match.end()
+            for literal, name, spec, conversion in _formatter.parse(match.group()):
+                static.append(literal)
+                if name is None:
+                    continue
+                if not _NAME.match(name):
+                    raise ValueError("Invalid placeholder {{{}}}".format(name))
+                statics.append("".join(static))
+                static = []
+                slots.append((name, conversion, spec or ""))
+        static.append(text[pos:])
+        statics.append("".join(static))
+
+        self._statics = tuple(statics)
+        self._slots = tuple(slots)
+        fields = []
+        for name, _, _ in slots:
+            if name not in fields:
+                fields.append(name)
+        self.fields = tuple(fields)
+
+    @staticmethod
+    def _format(slot, values):
+        """Return the escaped json string content for a slot."""
+        name, conversion, spec = slot
+        value = values[name]
+        if conversion is not None or spec or not isinstance(value, _string_types):
+            value = _formatter.convert_field(value, conversion)
+            value = _formatter.format_field(value, spec)
+        return _encode_str(value)[1:-1]
+
+    def render(self, **values):
+        """Return the compact json payload with the placeholders replaced.
+
+        Raises KeyError if a value is missing for a placeholder.
+        """
+        statics = self._statics
+        chunks = [statics[0]]
+        done = {}
+        for i, slot in enumerate(self._slots, 1):
+            text = done.get(slot)
+            if text is None:
+                text = done[slot] = self._format(slot, values)
+            chunks.append(text)
+            chunks.append(statics[i])
+        return "".join(chunks)
+
+    def render_bytes(self, **values):
+        """Return the rendered payload as UTF-8 encoded bytes."""
+        return self.render(**values).encode("ascii")
+
+    def send(self, connector_url, values, connector=None):
+        """Render the template with the values dict and send it.
+
+        connector_url -- The webhook URL to post the card to.
+        values -- Dict with a value for each placeholder.
+        connector -- Connector to send through. Defaults to the shared one.
+        """
+        if connector is None:
+            connector = default_connector()
+        return connector.send(connector_url, self.render_bytes(**values))
@@ -0,0 +1,332 @@
+"""Local stand-in for a Teams webhook connector, for tests and load tests.
+
+:class:`FakeTeamsServer` accepts posted cards like a Teams connector, and
+can be configured to be slow, to throttle, to fail and to reset
+connections, either at random or for given paths. Every request is
+recorded with its timing.
+
+Use it from pytest by adding ``pytest_plugins = ["msteams.testing"]`` to a
+conftest.py, which provides the ``teams_server`` fixture, or from the
+command line::
+
+    python -m msteams.testing --port 8080 --latency 0.05 --throttle-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+from timeit import default_timer as _timer
+
+try:
+    # Python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    # Fallback to python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+# A received request. status is None if the connection was reset, start is
+# the time the request was received and duration the time until it was
+# answered, both in seconds. headers is the message with the request
+# headers, which are looked up regardless of case.
+Request = namedtuple(
+    "Request",
+    ("path", "client_address", "body", "status", "start", "duration", "headers"),
+)
+
+# How to answer requests to a path. Each value that is None falls back to
+# the server settings. times limits the rule to the first requests.
+Rule = namedtuple(
+    "Rule", ("status", "latency", "retry_after", "reset", "close", "times")
+)
+
+
+def _check_card(body):
+    """Return an error message if body is not a valid MessageCard."""
+    from . import MessageCard
+
+    try:
+        card = MessageCard.from_json(body)
+    except (TypeError, ValueError) as e:
+        return "Invalid card: {}".format(e)
+    if "summary" not in card._attrs and "text" not in card._attrs:
+        return "Summary or Text is required."
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, which stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        start = _timer()
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        path = self.path
+        rule, draw = server._next(path)
+
+        latency = server.latency if rule.latency is None else rule.latency
+        if latency:
+            time.sleep(latency)
+
+        status = rule.status
+        if rule.reset or (status is None and draw < server.reset_rate):
+            # Close with a RST instead of answering
+            self.connection.setsockopt(
+                socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+            )
+            self.close_connection = True
+            server._record(
+                Request(path, self.client_address, body, None, start, 0, self.headers)
+            )
+            return
+
+        message = b"1"
+        if status is None:
+            draw -= server.reset_rate
+            if draw < server.throttle_rate:
+                status = 429
+            elif draw - server.throttle_rate < server.error_rate:
+                status = 503
+            else:
+                error = _check_card(body) if server.validate else None
+                status = 400 if error else 200
+                if error:
+                    message = error.encode("utf-8")
+        if status == 429:
+            message = b"Too many requests"
+
+        # Record before answering, so the request is seen once answered
+        server._record(
+            Request(
+                path,
+                self.client_address,
+                body,
+                status,
+                start,
+                _timer() - start,
+                self.headers,
+            )
+        )
+        self.send_response(status)
+        if status == 429:
+            retry_after = rule.retry_after
+            if retry_after is None:
+                retry_after = server.retry_after
+            self.send_header("Retry-After", str(retry_after))
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(message)))
+        self.end_headers()
+        self.wfile.write(message)
+        # Drop the connection without announcing it, like an idle timeout.
+        self.close_connection = rule.close
+
+    def log_message(self, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, *args)
+
+
+class FakeTeamsServer(ThreadingMixIn, HTTPServer):
+    """HTTP server answering posted cards like a Teams webhook connector.
+
+    host          -- Address to listen on.
+    port          -- Port to listen on. 0 picks a free port.
+    latency       -- Seconds to wait before answering each request.
+    throttle_rate -- Share of requests answered with 429 Too Many Requests.
+    retry_after   -- Retry-After header value of throttled requests.
+    error_rate    -- Share of requests answered with 503.
+    reset_rate    -- Share of requests where the connection is reset.
+    validate      -- Answer 400 to payloads that are not valid MessageCards.
+    seed          -- Seed for the random faults.
+
+    >>> from msteams import MessageCard
+    >>> with FakeTeamsServer() as server:
+    ...     response = MessageCard(title="Hello").send(server.url())
+    >>> response.status, server.requests[0].status
+    (200, 200)
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0,
+        throttle_rate=0,
+        retry_after=1,
+        error_rate=0,
+        reset_rate=0,
+        validate=True,
+        seed=None,
+        verbose=False,
+    ):
+        HTTPServer.__init__(self, (host, port), _Handler)
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.reset_rate = reset_rate
+        self.validate = validate
+        self.verbose = verbose
+        self.requests = []
+
+        self._random = random.Random(seed)
+        self._rules = {}
+        self._hits = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def url(self, path="/webhook"):
+        """Return the URL of path on the server."""
+        host, port = self.server_address[:2]
+        return "http://{}:{}{}".format(host, port, path)
+
+    def add_rule(
+        self,
+        path,
+        status=None,
+        latency=None,
+        retry_after=None,
+        reset=False,
+        close=False,
+        times=None,
+    ):
+        """Set how requests to path are answered, instead of at random.
+
+        path        -- Request path, including any query string.
+        status      -- Status code to answer with.
+        latency     -- Seconds to wait before answering.
+        retry_after -- Retry-After header value, if status is 429.
+        reset       -- Reset the connection instead of answering.
+        close       -- Close the connection after answering.
+        times       -- Only apply to this many requests, then answer as usual.
+        """
+        self._rules[path] = Rule(status, latency, retry_after, reset, close, times)
+
+    def _next(self, path):
+        """Count a request to path and return its rule and a random draw."""
+        with self._lock:
+            hits = self._hits[path] = self._hits.get(path, 0) + 1
+            draw = self._random.random()
+        rule = self._rules.get(path)
+        if rule is None or (rule.times is not None and hits > rule.times):
+            rule = Rule(None, None, None, False, False, None)
+        return rule, draw
+
+    def _record(self, request):
+        with self._lock:
+            self.requests.append(request)
+
+    @property
+    def timings(self):
+        """Durations in seconds of the answered requests."""
+        return [r.duration for r in self.requests if r.status is not None]
+
+    def stats(self):
+        """Return a dict with request counts per status and timing summary."""
+        requests = list(self.requests)
+        counts = {}
+        for r in requests:
+            status = "reset" if r.status is None else str(r.status)
+            counts[status] = counts.get(status, 0) + 1
+        timings = sorted(r.duration for r in requests if r.status is not None)
+        stats = {"requests": len(requests), "status": counts}
+        if timings:
+            stats["mean"] = sum(timings) / len(timings)
+            stats["p50"] = timings[len(timings) // 2]
+            stats["p99"] = timings[min(len(timings) - 1, len(timings) * 99 // 100)]
+        if len(requests) > 1:
+            elapsed = requests[-1].start - requests[0].start
+            if elapsed > 0:
+                stats["rate"] = (len(requests) - 1) / elapsed
+        return stats
+
+    def start(self):
+        """Serve requests from a background thread."""
+        # Poll often so that stop returns quickly
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and close the server."""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+
+if pytest is not None:
+
+    @pytest.fixture
+    def teams_server():
+        """A started FakeTeamsServer, stopped after the test."""
+        with FakeTeamsServer() as server:
+            yield server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m msteams.testing",
+        description="Run a fake Teams webhook connector.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0)
+    parser.add_argument("--retry-after", type=float, default=1)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--reset-rate", type=float, default=0)
+    parser.add_argument("--no-validate", dest="validate", action="store_false")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    server = FakeTeamsServer(
+        args.host,
+        args.port,
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        reset_rate=args.reset_rate,
+        validate=args.validate,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    sys.stderr.write("Listening on {}\n".format(server.url("/")))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sys.stderr.write(json.dumps(server.stats(), indent=2, sort_keys=True) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Pooled HTTP transport for sending payloads to webhook connectors.
+
+A :class:`Connector` keeps persistent (keep-alive) connections to each
+webhook host, so that sending many cards reuses the same sockets instead of
+doing a new TCP and TLS handshake for every card. Proxies are configured per
+connector and never touch process-wide ``urllib`` state.
+
+>>> connector = Connector(proxy="proxy.example.com:8080")
+>>> connector.proxy
+{'https': 'proxy.example.com:8080'}
+"""
+
+import base64
+import errno
+import io
+import socket
+import threading
+from collections import namedtuple
+from timeit import default_timer as _timer
+
+try:
+    # Python 3
+    import http.client as httplib
+    import queue
+    from urllib.error import HTTPError, URLError
+    from urllib.parse import unquote, urlsplit
+except ImportError:
+    # Fallback to python 2
+    import httplib
+    import Queue as queue
+    from urllib import unquote
+    from urllib2 import HTTPError, URLError
+    from urlparse import urlsplit
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 4
+DEFAULT_HEADERS = {"Content-Type": "application/json"}
+DEFAULT_WORKERS = 8
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Socket errors that indicate that a kept-alive connection was closed by the
+# remote end while it was idle in the pool.
+_STALE_ERRNOS = (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE)
+
+
+def _is_stale(exc):
+    """Check if exc means that a pooled connection had been closed."""
+    if isinstance(exc, (httplib.BadStatusLine, httplib.CannotSendRequest)):
+        return True
+    return isinstance(exc, socket.error) and exc.errno in _STALE_ERRNOS
+
+
+def _payload_bytes(card):
+    """Return the serialized payload of card, which may already be bytes."""
+    if isinstance(card, bytes):
+        return card
+    return card.to_bytes()
+
+
+class SendResult(namedtuple("SendResult", ("url", "status", "latency", "error"))):
+    """Outcome of sending a payload to one connector URL.
+
+    status  -- HTTP status code, or None if no response was received.
+    latency -- Time in seconds spent sending.
+    error   -- The raised exception, or None on success.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """True if the payload was accepted by the connector."""
+        return self.error is None
+
+
+class Response(object):
+    """Fully read response from a webhook connector.
+
+    Provides the parts of the ``urlopen`` response interface that are
+    meaningful for a response that has already been read.
+    """
+
+    def __init__(self, url, status, reason, headers, body):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def getcode(self):
+        """Return the HTTP status code."""
+        return self.status
+
+    def geturl(self):
+        """Return the URL the payload was sent to."""
+        return self.url
+
+    def info(self):
+        """Return the response headers."""
+        return self.headers
+
+    def read(self):
+        """Return the response body."""
+        return self.body
+
+
+def _parse_proxy(proxy):
+    """Split a proxy URL into (host, port, auth header)."""
+    if "://" not in proxy:
+        proxy = "http://" + proxy
+    parts = urlsplit(proxy)
+    headers = {}
+    if parts.username is not None:
+        credentials = "{}:{}".format(
+            unquote(parts.username), unquote(parts.password or "")
+        )
+        token = base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+        headers["Proxy-Authorization"] = "Basic {}".format(token)
+    return parts.hostname, parts.port, headers
+
+
+class Connector(object):
+    """Thread safe HTTP(S) client with a pool of persistent connections.
+
+    proxy   -- Proxy to use. Either a string, which is used for https, or a
+               dict mapping URL scheme to proxy, like urllib's ProxyHandler.
+    timeout -- Socket timeout in seconds.
+    maxsize -- Maximum number of idle connections kept per host.
+    context -- ssl.SSLContext used for https connections.
+    headers -- Extra headers sent with every request.
+    """
+
+    def __init__(
+        self,
+        proxy=None,
+        timeout=DEFAULT_TIMEOUT,
+        maxsize=DEFAULT_POOL_SIZE,
+        context=None,
+        headers=None,
+    ):
+        if proxy is not None and not isinstance(proxy, dict):
+            proxy = {"https": proxy}
+        self.proxy = proxy or {}
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.context = context
+        self.headers = dict(DEFAULT_HEADERS)
+        if headers is not None:
+            self.headers.update(headers)
+
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _new_connection(self, scheme, host, port):
+        """Create a connection to host, through a proxy if configured."""
+        proxy = self.proxy.get(scheme)
+        if proxy is None:
+            if scheme == "https":
+                return httplib.HTTPSConnection(
+                    host, port, timeout=self.timeout, context=self.context
+                )
+            return httplib.HTTPConnection(host, port, timeout=self.timeout)
+
+        proxy_host, proxy_port, proxy_headers = _parse_proxy(proxy)
+        if scheme == "https":
+            conn = httplib.HTTPSConnection(
+                proxy_host, proxy_port, timeout=self.timeout, context=self.context
+            )
+            conn.set_tunnel(host, port, headers=proxy_headers)
+            return conn
+        return httplib.HTTPConnection(proxy_host, proxy_port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        """Return an idle connection for key, or None if there is none."""
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool:
+                return pool.pop()
+        return None
+
+    def _release(self, key, conn):
+        """Return connection to the pool, or close it if the pool is full."""
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            if len(pool) < self.maxsize:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def _request(self, key, conn, target, data, headers):
+        """Send request on conn and return the response with its body read."""
+        conn.request("POST", target, body=data, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return resp, body
+
+    def send(self, connector_url, data, headers=None):
+        """POST data to connector_url and return a Response.
+
+        Raises HTTPError for non 2xx responses and URLError if the connector
+        could not be reached, just like urlopen.
+        """
+        parts = urlsplit(connector_url)
+        scheme = parts.scheme.lower()
+        if scheme not in _DEFAULT_PORTS:
+            raise ValueError("Unsupported URL scheme {}".format(parts.scheme))
+        host = parts.hostname
+        port = parts.port or _DEFAULT_PORTS[scheme]
+        key = (scheme, host, port)
+
+        req_headers = self.headers
+        if headers is not None:
+            req_headers = dict(self.headers)
+            req_headers.update(headers)
+
+        if scheme == "http" and "http" in self.proxy:
+            # Sent to the proxy as is, so it needs the proxy credentials
+            target = connector_url
+            proxy_headers = _parse_proxy(self.proxy["http"])[2]
+            if proxy_headers:
+                req_headers = dict(req_headers)
+                req_headers.update(proxy_headers)
+        else:
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+
+        conn = self._acquire(key)
+        try:
+            if conn is not None:
+                try:
+                    resp, body = self._request(key, conn, target, data, req_headers)
+                except (httplib.HTTPException, socket.error) as e:
+                    if not _is_stale(e):
+                        raise
+                    # The pooled connection was closed while idle, retry once
+                    # on a fresh connection.
+                    conn.close()
+                    conn = None
+            if conn is None:
+                conn = self._new_connection(scheme, host, port)
+                resp, body = self._request(key, conn, target, data, req_headers)
+        except (httplib.HTTPException, socket.error) as e:
+            if conn is not None:
+                conn.close()
+            raise URLError(e)
+
+        if not 200 <= resp.status < 300:
+            raise HTTPError(
+                connector_url, resp.status, resp.reason, resp.msg, io.BytesIO(body)
+            )
+        return Response(connector_url, resp.status, resp.reason, resp.msg, body)
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+
+
+_default_connectors = {}
+_default_lock = threading.Lock()
+
+
+def default_connector(proxy=None):
+    """Return the shared Connector used for the given proxy configuration."""
+    key = proxy
+    if isinstance(proxy, dict):
+        key = tuple(sorted(proxy.items()))
+    with _default_lock:
+        connector = _default_connectors.get(key)
+        if connector is None:
+            connector = _default_connectors[key] = Connector(proxy=proxy)
+    return connector
+
+
+# Errors of a send that are returned in its SendResult instead of raised.
+_SEND_ERRORS = (URLError, ValueError)
+
+
+def _send_result(connector_url, start, resp=None, error=None):
+    """Return the SendResult of a send started at start."""
+    latency = _timer() - start
+    if error is None:
+        return SendResult(connector_url, resp.status, latency, None)
+    status = error.code if isinstance(error, HTTPError) else None
+    return SendResult(connector_url, status, latency, error)
+
+
+def _timed_send(connector, connector_url, data):
+    """Send data and return a SendResult instead of raising."""
+    start = _timer()
+    try:
+        resp = connector.send(connector_url, data)
+    except _SEND_ERRORS as e:
+        return _send_result(connector_url, start, error=e)
+    return _send_result(connector_url, start, resp)
+
+
+def send_many(card, connector_urls, max_workers=DEFAULT_WORKERS, connector=None):
+    """Send one card to many connector URLs in parallel.
+
+    The card is serialized once and sent from a pool of max_workers threads.
+    Returns a list of SendResults in the same order as connector_urls.
+
+    card -- The MessageCard to send, or its already serialized payload.
+    connector_urls -- Iterable with the webhook URLs to send to.
+    max_workers -- Maximum number of concurrent sends.
+    connector -- Connector to send through. Defaults to the shared Connector.
+    """
+    data = _payload_bytes(card)
+    connector_urls = list(connector_urls)
+    if connector is None:
+        connector = default_connector()
+
+    results = [None] * len(connector_urls)
+    jobs = queue.Queue()
+    for job in enumerate(connector_urls):
+        jobs.put(job)
+
+    def worker():
+        while True:
+            try:
+                index, connector_url = jobs.get_nowait()
+            except queue.Empty:
+                return
+            results[index] = _timed_send(connector, connector_url, data)
+
+    threads = [
+        threading.Thread(target=worker)
+        for _ in range(min(max_workers, len(connector_urls)))
+    ]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,315 @@
+"""Sending cards from a pool of worker processes.
+
+A :class:`ProcessDispatcher` shards cards across worker processes by their
+connector URL, so that the sending is not limited by a single interpreter.
+All cards for a connector URL go to the same process, which sends them one
+at a time in the order they were submitted, while different connector URLs
+are sent in parallel. Cards are serialized before they are handed to a
+process, so only the payload bytes cross the process boundary.
+"""
+
+import logging
+import multiprocessing
+import random
+import threading
+import time
+import zlib
+from collections import deque
+from timeit import default_timer as _timer
+
+from .dispatch import (
+    DEFAULT_BACKOFF,
+    DEFAULT_BURST,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_MAX_QUEUE,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE,
+    DispatchStats,
+    TokenBucket,
+    _retry_after,
+)
+from .transport import Connector, HTTPError, SendResult, URLError, _payload_bytes
+
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Fallback to python 2
+    import Queue as queue
+
+DEFAULT_PROCESSES = multiprocessing.cpu_count()
+DEFAULT_THREADS = 4
+
+_log = logging.getLogger(__name__)
+
+
+def _shard(connector_url, count):
+    """Return the index of the process that sends to connector_url."""
+    return zlib.crc32(connector_url.encode("utf-8")) % count
+
+
+class _Channels(object):
+    """Send the cards of each connector URL in order from a few threads.
+
+    Runs in a worker process. A connector URL is handled by at most one
+    thread at a time, which sends its cards until none are left.
+    """
+
+    def __init__(self, results, threads, options):
+        self.results = results
+        self.options = options
+        self.connector = Connector()
+        self._channels = {}
+        self._buckets = {}
+        self._ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work) for _ in range(threads)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def put(self, connector_url, data):
+        with self._lock:
+            channel = self._channels.get(connector_url)
+            if channel is None:
+                self._channels[connector_url] = deque([data])
+                self._ready.put(connector_url)
+            else:
+                channel.append(data)
+
+    def close(self):
+        for _ in self._threads:
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _send(self, connector_url, data):
+        """Send data with rate limiting and retries, and report the result."""
+        rate, burst, max_retries, backoff, max_backoff = self.options
+        bucket = self._buckets.get(connector_url)
+        if bucket is None:
+            bucket = self._buckets[connector_url] = TokenBucket(rate, burst)
+        attempt = 0
+        while True:
+            delay = bucket.take()
+            while delay:
+                time.sleep(delay)
+                delay = bucket.take()
+            start = _timer()
+            status = error = None
+            retryable = False
+            try:
+                status = self.connector.send(connector_url, data).status
+            except HTTPError as e:
+                status, error = e.code, e
+                retryable = status == 429 or status >= 500
+            except URLError as e:
+                error, retryable = e, True
+            except Exception as e:
+                error = e
+            latency = _timer() - start
+            if not retryable or attempt >= max_retries:
+                message = None if error is None else str(error)
+                self.results.put((connector_url, status, latency, message, attempt))
+                return
+            attempt += 1
+            delay = min(max_backoff, backoff * 2 ** (attempt - 1))
+            delay = random.uniform(delay / 2, delay)
+            if status == 429:
+                retry_after = _retry_after(error)
+                if retry_after is not None:
+                    delay = retry_after + random.uniform(0, backoff)
+                bucket.block(_timer() + delay)
+            else:
+                time.sleep(delay)
+
+    def _work(self):
+        while True:
+            connector_url = self._ready.get()
+            if connector_url is None:
+                return
+            channel = self._channels[connector_url]
+            while True:
+                self._send(connector_url, channel[0])
+                with self._lock:
+                    channel.popleft()
+                    if not channel:
+                        del self._channels[connector_url]
+                        break
+
+
+def _worker_main(jobs, results, threads, options):
+    """Entry point of a worker process."""
+    channels = _Channels(results, threads, options)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        channels.put(*job)
+    channels.close()
+    results.put(None)
+
+
+class ProcessDispatcher(object):
+    """Send cards from a pool of worker processes, in order per connector.
+
+    Submitting never blocks: when the process for a connector URL already
+    has max_queue cards queued or being sent, the card is dropped and
+    counted. Cards that are throttled
+    (HTTP 429) or fail are retried like with Dispatcher, holding back the
+    later cards for the same connector URL.
+
+    processes   -- Number of worker processes.
+    threads     -- Number of sender threads in each process, i.e. how many
+                   connector URLs each process sends to in parallel.
+    rate        -- Sustained sends per second allowed per connector URL.
+    burst       -- Number of sends per connector URL allowed in a burst.
+    max_queue   -- Maximum number of cards per process that are queued or
+                   being sent before new ones are dropped.
+    max_retries -- Number of retries for throttled or failed sends.
+    backoff     -- Base delay in seconds for the exponential backoff.
+    max_backoff -- Maximum delay in seconds between retries.
+    callback    -- Called with a SendResult when a card is sent or given up.
+                   The error of the result is rebuilt from its message.
+    """
+
+    def __init__(
+        self,
+        processes=DEFAULT_PROCESSES,
+        threads=DEFAULT_THREADS,
+        rate=DEFAULT_RATE,
+        burst=DEFAULT_BURST,
+        max_queue=DEFAULT_MAX_QUEUE,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        max_backoff=DEFAULT_MAX_BACKOFF,
+        callback=None,
+    ):
+        self.callback = callback
+        options = (rate, burst, max_retries, backoff, max_backoff)
+
+        self._cond = threading.Condition()
+        self._closed = False
+        self._pending = 0
+        self._sent = 0
+        self._failed = 0
+        self._retried = 0
+        self._dropped = 0
+        self.max_queue = max_queue
+        # Cards submitted to each process that are not sent or given up yet
+        self._shard_pending = [0] * processes
+
+        self._results = multiprocessing.Queue()
+        self._queues = []
+        self._processes = []
+        for _ in range(processes):
+            jobs = multiprocessing.Queue(max_queue)
+            process = multiprocessing.Process(
+                target=_worker_main, args=(jobs, self._results, threads, options)
+            )
+            process.daemon = True
+            process.start()
+            self._queues.append(jobs)
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect)
+        self._collector.daemon = True
+        self._collector.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def queue_depth(self):
+        """Number of cards waiting to be sent or retried."""
+        return self._pending
+
+    @property
+    def stats(self):
+        """Snapshot of the dispatcher counters."""
+        with self._cond:
+            return DispatchStats(
+                self._pending, self._sent, self._failed, self._retried, self._dropped
+            )
+
+    def submit(self, card, connector_url):
+        """Queue card for sending to connector_url without blocking.
+
+        card may be a MessageCard or an already serialized payload. Returns
+        False if the card was dropped because the queue is full or the
+        dispatcher is closed.
+        """
+        data = _payload_bytes(card)
+        shard = _shard(connector_url, len(self._queues))
+        with self._cond:
+            # The processes move the cards from their queue right away, so
+            # the cards they have not sent yet are counted here instead.
+            if self._closed or self._shard_pending[shard] >= self.max_queue:
+                self._dropped += 1
+                return False
+            try:
+                self._queues[shard].put_nowait((connector_url, data))
+            except queue.Full:
+                self._dropped += 1
+                return False
+            self._pending += 1
+            self._shard_pending[shard] += 1
+        return True
+
+    def _collect(self):
+        """Count the results reported by the processes until they exit."""
+        running = len(self._processes)
+        while running:
+            result = self._results.get()
+            if result is None:
+                running -= 1
+                continue
+            connector_url, status, latency, message, retries = result
+            with self._cond:
+                self._pending -= 1
+                self._shard_pending[_shard(connector_url, len(self._queues))] -= 1
+                self._retried += retries
+                if message is None:
+                    self._sent += 1
+                else:
+                    self._failed += 1
+                self._cond.notify_all()
+            if self.callback is not None:
+                error = None
+                if message is not None and status is not None:
+                    error = HTTPError(connector_url, status, message, {}, None)
+                elif message is not None:
+                    error = URLError(message)
+                try:
+                    self.callback(SendResult(connector_url, status, latency, error))
+                except Exception:
+                    # Keep counting the results of the remaining cards
+                    _log.exception("ProcessDispatcher callback failed")
+
+    def join(self, timeout=None):
+        """Wait until all queued cards are sent or given up.
+
+        Returns False if the timeout expired first.
+        """
+        deadline = None if timeout is None else _timer() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = None if deadline is None else deadline - _timer()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Stop accepting cards, wait for the queues to drain and stop."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+        for jobs in self._queues:
+            jobs.put(None)
+        for process in self._processes:
+            process.join(timeout)
+        self._collector.join(timeout)
@@ -19,6 +19,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/johanjeppsson/msteams",
     packages=setuptools.find_packages(),
+    entry_points={"console_scripts": ["msteams = msteams.cli:main"]},
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -118,8 +118,16 @@ def test_action_card():
     card.set_actions(post)
     assert card.json_payload == json.dumps(e)
 
-    card = ActionCard(name=e["name"], inputs=ip, actions=post)
-    card.set_name(e["name"])
+    card = ActionCard(name=e["name"])
     card.add_inputs(ip)
     card.add_actions(post)
     assert card.json_payload == json.dumps(e)
+
+    other = TextInput(id="other")
+    card.add_inputs([other])
+    card.add_actions(post)
+    e["inputs"].append(other.payload)
+    e["actions"].append(e["actions"][0])
+    assert card.json_payload == json.dumps(e)
+    with pytest.raises(TypeError):
+        card.add_inputs(post)
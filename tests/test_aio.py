@@ -0,0 +1,108 @@
+import asyncio
+import gc
+import warnings
+
+import pytest
+
+import msteams as ms
+from msteams import aio
+from msteams.aio import AsyncConnector, HTTPError, URLError, send_many
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_send_reuses_connection(server):
+    async def send():
+        async with AsyncConnector() as connector:
+            for i in range(3):
+                resp = await connector.send(server.url("/hook?i={}".format(i)), b"{}")
+                assert resp.getcode() == 200
+                assert resp.read() == b"1"
+
+    _run(send())
+    paths = [r[0] for r in server.requests]
+    assert paths == ["/hook?i=0", "/hook?i=1", "/hook?i=2"]
+    assert len(set(r[1] for r in server.requests)) == 1
+
+
+def test_send_concurrent(server):
+    async def send():
+        connector = AsyncConnector(limit_per_host=2)
+        coros = [connector.send(server.url(), b"{}") for _ in range(10)]
+        responses = await asyncio.gather(*coros)
+        connector.close()
+        return responses
+
+    assert [r.status for r in _run(send())] == [200] * 10
+    assert len(set(r[1] for r in server.requests)) <= 2
+
+
+def test_send_stale_connection(server):
+    async def send():
+        async with AsyncConnector() as connector:
+            await connector.send(server.url("/drop"), b"{}")
+            await asyncio.sleep(0.1)
+            return await connector.send(server.url(), b"{}")
+
+    assert _run(send()).status == 200
+    assert len(server.requests) == 2
+
+
+def test_send_errors(server):
+    async def send(path):
+        async with AsyncConnector(timeout=0.1) as connector:
+            return await connector.send(server.url(path), b"{}")
+
+    with pytest.raises(HTTPError) as e:
+        _run(send("/bad"))
+    assert e.value.code == 400
+
+    with pytest.raises(URLError):
+        _run(send("/slow"))
+
+    with pytest.raises(ValueError):
+        _run(AsyncConnector().send("ftp://127.0.0.1/", b"{}"))
+
+
+def test_card_send_async(server):
+    card = ms.MessageCard(title="Title", summary="Summary")
+
+    async def send():
+        return await card.send_async(server.url())
+
+    assert _run(send()).status == 200
+    assert server.requests[0][2] == card.json_payload.encode("utf-8")
+
+
+def test_default_connector(server):
+    card = ms.MessageCard(title="Title", summary="Summary")
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        for _ in range(3):
+            assert _run(card.send_async(server.url())).status == 200
+            gc.collect()
+    assert not [w for w in caught if w.category is ResourceWarning]
+    assert len(aio._default_connectors) == 1
+    assert not any(
+        p for c in aio._default_connectors.values() for p in c._pools.values()
+    )
+
+
+def test_send_many(server):
+    card = ms.MessageCard(title="Title", summary="Summary")
+    urls = [server.url("/a"), server.url("/bad"), server.url("/c")]
+
+    async def send():
+        async with AsyncConnector() as connector:
+            return await send_many(card, urls, connector=connector)
+
+    results = _run(send())
+    assert [r.url for r in results] == urls
+    assert [r.status for r in results] == [200, 400, 200]
+    assert [r.ok for r in results] == [True, False, True]
@@ -1,8 +1,14 @@
+import copy
+import gc
+import json
+import pickle
 from collections import OrderedDict
 
 import pytest
 
-from msteams import CardObject, Fact, Field
+from io import BytesIO, StringIO
+
+from msteams import CardObject, Fact, Field, lazy_validation, unchecked
 
 
 class _TestObj(CardObject):
@@ -94,3 +100,219 @@ def test_str():
 
     assert str(obj) == "_TestObj(str, str_list)"
     assert repr(obj) == "_TestObj(str = a, str_list = ['b', 'c'])"
+
+
+def test_payload():
+
+    obj = _TestObj(
+        str="a",
+        str_list=["b", "c"],
+        bool=False,
+        fact=Fact("a", "b"),
+        fact_list=[Fact("c", "d")],
+    )
+
+    assert obj.payload == OrderedDict(
+        (
+            ("str", "a"),
+            ("strList", ["b", "c"]),
+            ("bool", False),
+            ("fact", OrderedDict((("name", "a"), ("value", "b")))),
+            ("factList", [OrderedDict((("name", "c"), ("value", "d")))]),
+        )
+    )
+    assert _TestObj._get_plan() is _TestObj._get_plan()
+
+
+def test_json():
+
+    obj = _TestObj(
+        str=b'\xc3\xa5"'.decode("utf-8"),
+        str_list=["b", "c"],
+        bool=False,
+        bool_list=[True],
+        fact=Fact("a", "b"),
+        fact_list=[Fact("c", "d"), Fact("e", "f")],
+    )
+    expected = json.dumps(obj.payload, separators=(", ", ": "))
+
+    assert obj.json_payload == expected
+    assert obj.to_bytes() == expected.encode("utf-8")
+    assert obj.get_payload(fmt="bytes") == expected.encode("utf-8")
+    assert obj.get_payload(fmt="bytes", indent=2) == json.dumps(
+        obj.payload, indent=2, separators=(",", ": ")
+    ).encode("utf-8")
+
+    fp = StringIO()
+    obj.dump(fp)
+    assert fp.getvalue() == expected
+    fp = BytesIO()
+    obj.dump(fp)
+    assert fp.getvalue() == expected.encode("utf-8")
+    assert _TestObj().json_payload == "{}"
+
+
+def test_cache():
+
+    fact, other = Fact("a", "b"), Fact("c", "d")
+    obj = _TestObj(fact=fact, fact_list=[other])
+    shared = _TestObj(fact_list=[other])
+    expected = json.dumps(obj.payload, separators=(", ", ": "))
+    assert obj.json_payload == expected
+    assert shared.json_payload == '{"factList": [{"name": "c", "value": "d"}]}'
+    cached = fact._cache
+    assert obj.json_payload is obj.json_payload
+
+    other["value"] = "e"
+    assert obj.json_payload == expected.replace('"d"', '"e"')
+    assert shared.json_payload == '{"factList": [{"name": "c", "value": "e"}]}'
+    assert fact._cache is cached
+
+    obj["str"] = "s"
+    assert obj.json_payload.startswith('{"str": "s", "fact"')
+    assert fact._cache is cached
+
+
+def test_cache_shared():
+
+    shared = Fact("a", "b")
+    objs = [_TestObj(fact=shared) for _ in range(100)]
+    objs.append(_TestObj(fact=shared, fact_list=[shared]))
+    assert len(shared._parents) == 101
+    del objs[:98]
+    gc.collect()
+    assert len(shared._parents) == 3
+
+    payloads = [obj.json_payload for obj in objs]
+    shared["value"] = "c"
+    assert [obj.json_payload for obj in objs] == [
+        p.replace('"b"', '"c"') for p in payloads
+    ]
+
+
+def test_leaf_slots():
+
+    fact = Fact("a", "b")
+    assert not hasattr(fact, "__dict__")
+    assert fact._attrs == {"name": "a", "value": "b"}
+    with pytest.raises(KeyError):
+        fact["other"]
+
+
+def test_copy_pickle():
+
+    obj = _TestObj(str="a", fact=Fact("a", "b"), fact_list=[Fact("c", "d")])
+    obj.json_payload
+
+    for other in (copy.deepcopy(obj), pickle.loads(pickle.dumps(obj))):
+        assert other == obj
+        assert other.json_payload == obj.json_payload
+        other["fact_list"][0]["value"] = "e"
+        assert other.json_payload != obj.json_payload
+
+    shallow = copy.copy(obj)
+    shallow._append_field("fact_list", Fact("e", "f"))
+    assert len(obj["fact_list"]) == 1
+    assert json.loads(obj.json_payload)["factList"] == [{"name": "c", "value": "d"}]
+
+
+def test_static_payload():
+    class _Typed(_TestObj):
+        _payload = OrderedDict((("@type", "Typed"),))
+
+    class _Baseline(CardObject):
+        def __init__(self):
+            super(_Baseline, self).__init__()
+            self._payload["@type"] = "Baseline"
+
+    assert _Typed(str="a").payload == OrderedDict((("@type", "Typed"), ("str", "a")))
+    with pytest.raises(TypeError):
+        _Baseline()
+    with pytest.raises(TypeError):
+        _Typed._payload["@type"] = "Other"
+    assert _TestObj(str="a").json_payload == '{"str": "a"}'
+
+
+def test_append_field():
+
+    str_list = ["a"]
+    obj = _TestObj(str_list=str_list)
+    obj._append_field("str_list", "b")
+    obj._append_field("str_list", ["c", "d"])
+    assert obj["str_list"] == ["a", "b", "c", "d"]
+    assert str_list == ["a"]
+
+    obj._append_field("fact_list", {"e": "f"})
+    assert obj["fact_list"] == [Fact("e", "f")]
+
+    with pytest.raises(TypeError):
+        obj._append_field("str_list", [1])
+    assert obj["str_list"] == ["a", "b", "c", "d"]
+
+
+def test_unchecked():
+
+    with unchecked():
+        obj = _TestObj(str=1, str_list="a", fact_list={"a": "b"})
+    assert obj["str"] == 1
+    assert obj["str_list"] == ["a"]
+    assert obj["fact_list"] == [Fact("a", "b")]
+
+    with pytest.raises(TypeError) as e:
+        obj.validate()
+    assert str(e.value).startswith("str: ")
+    obj["str"] = "a"
+    obj.validate()
+
+    with pytest.raises(TypeError):
+        obj["str"] = 1
+    with pytest.raises(ValueError):
+        _TestObj.construct(otherfield=1)
+
+    with unchecked():
+        obj = _TestObj(fact_list={"a": "b"})
+        obj._append_field("fact_list", Fact("c", "d"))
+        obj._append_field("fact_list", {"e": "f"})
+    with lazy_validation():
+        obj._append_field("fact_list", {"g": "h"})
+    assert [f["name"] for f in obj["fact_list"]] == ["a", "c", "e", "g"]
+    assert json.loads(obj.json_payload)["factList"][3] == {"name": "g", "value": "h"}
+
+    fact = Fact.construct("a", 1)
+    assert fact["value"] == 1
+    obj = _TestObj(fact_list=[Fact("a", "b"), fact])
+    with pytest.raises(TypeError) as e:
+        obj.validate()
+    assert str(e.value).startswith("fact_list[1].value: ")
+
+
+def test_lazy_validation():
+
+    with lazy_validation():
+        obj = _TestObj(str="a", fact_list={"a": "b"})
+    assert obj["fact_list"] == [Fact("a", "b")]
+
+    payload = json.loads(obj.json_payload)
+    assert payload["factList"] == [{"name": "a", "value": "b"}]
+    assert obj["fact_list"] == [Fact("a", "b")]
+
+    with lazy_validation():
+        obj._append_field("fact_list", Fact("c", "d"))
+    assert obj.get_payload()["factList"][1] == {"name": "c", "value": "d"}
+
+    with lazy_validation():
+        obj["str"] = 1
+    with pytest.raises(TypeError) as e:
+        obj.to_bytes()
+    assert str(e.value).startswith("str: ")
+    obj["str"] = "a"
+    assert obj.get_payload()["str"] == "a"
+
+    fact = Fact("a", "b")
+    obj = _TestObj(fact_list=[fact])
+    obj.to_bytes()
+    with lazy_validation():
+        fact["value"] = 1
+    with pytest.raises(TypeError) as e:
+        obj.get_payload()
+    assert str(e.value).startswith("fact_list[0].value: ")
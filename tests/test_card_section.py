@@ -3,7 +3,7 @@ from collections import OrderedDict
 
 import pytest
 
-from msteams import CardSection, Fact, HttpPostAction, ImageObject
+from msteams import CardSection, Fact, FactColumns, HttpPostAction, ImageObject
 
 EXPECTED_ACTIVITY = OrderedDict(
     (
@@ -95,6 +95,43 @@ def test_facts():
     assert section.json_payload == json.dumps(e)
 
 
+def test_fact_columns():
+    e = EXPECTED_FACTS
+    names = [f["name"] for f in e["facts"]]
+    values = [f["value"] for f in e["facts"]]
+
+    section = CardSection()
+    section.set_facts_from_columns(names, values)
+    assert section.json_payload == json.dumps(e)
+    assert section.payload == e
+    assert section["facts"] == [Fact(n, v) for n, v in zip(names, values)]
+    assert section == CardSection(facts=OrderedDict(zip(names, values)))
+
+    section = CardSection()
+    section.set_facts_from_rows(zip(names, values))
+    assert section.json_payload == json.dumps(e)
+
+    section = CardSection()
+    section.add_fact(names[0], values[0])
+    section.add_facts_from_columns(names[1:], values[1:])
+    assert isinstance(section["facts"], FactColumns)
+    assert section.json_payload == json.dumps(e)
+
+    section = CardSection()
+    section.set_facts_from_columns(names[:1], values[:1])
+    section.add_facts([Fact(n, v) for n, v in zip(names[1:], values[1:])])
+    assert section.json_payload == json.dumps(e)
+
+    section = CardSection(facts=FactColumns(["a", "b"], [1, 2.5]))
+    assert section["facts"][1] == Fact("b", "2.5")
+    assert section.validate() is None
+
+    with pytest.raises(ValueError):
+        FactColumns(["a", "b"], ["1"])
+    with pytest.raises(TypeError):
+        CardSection(text=FactColumns(["a"], ["1"]))
+
+
 def test_texts():
     e = EXPECTED_TEXT
     section = CardSection()
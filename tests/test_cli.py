@@ -0,0 +1,81 @@
+import json
+
+import msteams as ms
+from msteams.cli import main
+
+
+def test_cli(tmpdir, server, capsys):
+    card = ms.MessageCard(title="Title", summary="Summary")
+    feed = tmpdir.join("cards.jsonl")
+    feed.write(card.get_payload(fmt="json") + "\n\n" + card.get_payload(fmt="json"))
+
+    argv = [str(feed), "--url", server.url("/a"), "--url", server.url("/flaky")]
+    assert main(argv + ["--backoff", "0.01"]) == 0
+    assert sorted(r.path for r in server.requests) == [
+        "/a",
+        "/a",
+        "/flaky",
+        "/flaky",
+        "/flaky",
+    ]
+    assert all(r.body == card.to_bytes() for r in server.requests)
+    summary = capsys.readouterr().err
+    assert "sent: 4, failed: 0, retried: 1, dropped: 0" in summary
+    assert "throughput" in summary and "latency" in summary
+
+    assert main([str(feed), "--url", server.url("/bad"), "--retries", "0"]) == 1
+    assert "sent: 0, failed: 2" in capsys.readouterr().err
+
+
+def test_cli_template(tmpdir, server, capsys):
+    template = tmpdir.join("card.json")
+    template.write(ms.MessageCard(title="{host} is down").get_payload(fmt="json"))
+    feed = tmpdir.join("values.jsonl")
+    feed.write('{"host": "db1"}\n{"name": "db2"}\n[]\n{"host": "db3"}\n')
+
+    argv = [str(feed), "--url", server.url(), "--template", str(template)]
+    assert main(argv + ["--processes", "1", "--quiet"]) == 1
+    titles = [json.loads(r.body.decode("utf-8"))["title"] for r in server.requests]
+    assert titles == ["db1 is down", "db3 is down"]
+    errors = capsys.readouterr().err.splitlines()
+    assert errors == [
+        "line 2: Missing value for 'host'",
+        "line 3: Expected a json object",
+    ]
+
+
+def test_cli_template_invalid_values(tmpdir, server, capsys):
+    template = tmpdir.join("card.json")
+    card = ms.MessageCard(title="{host}", text="load {load:.1f}")
+    template.write(card.get_payload(fmt="json"))
+    feed = tmpdir.join("values.jsonl")
+    feed.write(
+        '{"host": "db1", "load": null}\n'
+        '{"host": "db2", "load": 1, "self": 1}\n'
+        '{"host": "db3", "load": {}}\n'
+        '{"host": "db4", "load": 1.5}\n'
+    )
+
+    argv = [str(feed), "--url", server.url(), "--template", str(template)]
+    assert main(argv + ["--processes", "1"]) == 1
+    texts = [json.loads(r.body.decode("utf-8"))["text"] for r in server.requests]
+    assert texts == ["load 1.5"]
+    errors = capsys.readouterr().err.splitlines()
+    assert [e.split(":")[0] for e in errors[:3]] == ["line 1", "line 2", "line 3"]
+    assert all(": Invalid values: " in e for e in errors[:3])
+    assert "sent: 1, failed: 0, retried: 0, dropped: 0" in errors
+    assert "invalid lines: 3" in errors
+
+
+def test_cli_invalid(tmpdir, server, capsys):
+    card = ms.MessageCard(title="Title")
+    feed = tmpdir.join("cards.jsonl")
+    feed.write('{"title": \n"text"\n' + card.get_payload(fmt="json") + "\n")
+
+    assert main([str(feed), "--url", server.url("/flaky"), "--backoff", "0.01"]) == 1
+    assert [r.body for r in server.requests] == [card.to_bytes()] * 2
+    summary = capsys.readouterr().err
+    assert "line 1: " in summary
+    assert "line 2: Expected a json object" in summary
+    assert "sent: 1, failed: 0" in summary
+    assert "invalid lines: 2" in summary
@@ -0,0 +1,55 @@
+import time
+
+from mock import Mock
+
+import msteams as ms
+from msteams.dedup import Deduplicator
+
+
+def test_digest():
+    card = ms.MessageCard(title="Title")
+    digest = card.digest()
+    assert digest == card.freeze().digest()
+    assert card.digest() is digest
+    assert hash(card) == hash(ms.MessageCard(title="Title"))
+    assert len({card, ms.MessageCard(title="Title"), card.freeze()}) == 1
+
+    card.set_title("Other")
+    assert card.digest() != digest
+
+    section = ms.CardSection(facts={"a": "b"})
+    card.add_section(section)
+    digest = card.digest()
+    section.add_fact("c", "d")
+    assert card.digest() != digest
+
+
+def test_symmetric_eq():
+    a = ms.MessageCard(title="Title")
+    b = ms.MessageCard(title="Title", text="Text")
+    assert a != b
+    assert b != a
+
+
+def test_dedup():
+    sender = Mock(return_value=True)
+    dedup = Deduplicator(sender, ttl=0.1, maxsize=2)
+    card = ms.MessageCard(title="Title")
+
+    assert dedup.submit(card, "http://a/")
+    assert not dedup.submit(ms.MessageCard(title="Title"), "http://a/")
+    assert not dedup.submit(card.to_bytes(), "http://a/")
+    assert dedup.submit(card, "http://b/")
+    assert sender.call_count == 2
+    assert dedup.suppressed_count(card, "http://a/") == 2
+    assert dedup.stats == (2, 2, 2)
+
+    assert dedup.submit(card, "http://c/")
+    assert dedup.stats.entries == 2
+    assert dedup.submit(card, "http://a/")
+
+    time.sleep(0.15)
+    assert dedup.stats.entries == 2
+    assert not dedup.check(card, "http://b/")
+    assert dedup.stats.entries == 1
+    assert dedup.suppressed_count(card, "http://b/") == 0
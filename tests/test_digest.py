@@ -0,0 +1,131 @@
+import time
+
+import pytest
+from mock import Mock
+
+import msteams as ms
+from msteams.digest import DigestAggregator
+
+
+def _alert(i, color="FF0000"):
+    card = ms.MessageCard(title="Alert {}".format(i), text="Text {}".format(i))
+    card.set_theme_color(color)
+    card.add_section(ms.CardSection(text="More", facts={"host": "db{}".format(i)}))
+    card.add_potential_action(ms.OpenUriAction("Open", {"default": "https://x/"}))
+    return card
+
+
+def test_merge():
+    aggregator = DigestAggregator(dispatcher=Mock())
+    digest = aggregator.merge([_alert(1), _alert(2).freeze(), _alert(3).to_bytes()])
+    assert digest["title"] == digest["summary"] == "3 notifications"
+    assert digest["theme_color"] == "FF0000"
+    sections = digest["sections"]
+    assert [s["activity_title"] for s in sections] == ["Alert 1", "Alert 2", "Alert 3"]
+    assert sections[0]["text"] == "Text 1\n\nMore"
+    assert sections[0]["facts"] == [ms.Fact("host", "db1")]
+    assert sections[0]["potential_action"] == _alert(1)["potential_action"]
+
+    digest = aggregator.merge([_alert(1), _alert(2, "00FF00")])
+    assert "theme_color" not in digest.payload
+
+    aggregator = DigestAggregator(dispatcher=Mock(), key=lambda c: c["theme_color"])
+    digest = aggregator.merge([_alert(1), _alert(2, "00FF00"), _alert(3)])
+    sections = digest["sections"]
+    assert [s["activity_title"] for s in sections] == ["FF0000 (2)", "00FF00 (1)"]
+    assert sections[0]["facts"] == [
+        ms.Fact("Alert 1", "Text 1\n\nMore"),
+        ms.Fact("host", "db1"),
+        ms.Fact("Alert 3", "Text 3\n\nMore"),
+        ms.Fact("host", "db3"),
+    ]
+    assert sections[0]["potential_action"] == (
+        _alert(1)["potential_action"] + _alert(3)["potential_action"]
+    )
+
+
+def _wait(condition, timeout=5):
+    """Wait until condition() is true, for sends by the aggregator thread."""
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_aggregate():
+    dispatcher = Mock()
+    with DigestAggregator(window=60, max_cards=3, dispatcher=dispatcher) as aggregator:
+        for i in range(4):
+            assert aggregator.add(_alert(i), "http://a/")
+        assert aggregator.add(_alert(0), "http://b/")
+        assert _wait(lambda: dispatcher.submit.call_count == 1)
+        assert aggregator.pending == 2
+        aggregator.flush()
+        assert aggregator.pending == 0
+        assert dispatcher.submit.call_count == 3
+
+    calls = [c[0] for c in dispatcher.submit.call_args_list]
+    assert sorted((c[1], c[0]["title"]) for c in calls) == [
+        ("http://a/", "1 notifications"),
+        ("http://a/", "3 notifications"),
+        ("http://b/", "1 notifications"),
+    ]
+    assert not aggregator.add(_alert(0), "http://a/")
+    assert not dispatcher.close.called
+
+    with DigestAggregator(window=0, dispatcher=dispatcher) as aggregator:
+        aggregator.add(_alert(0), "http://c/")
+        assert _wait(lambda: aggregator.pending == 0)
+    assert dispatcher.submit.call_args[0][1] == "http://c/"
+
+
+def test_split_and_send(server):
+    with DigestAggregator(max_bytes=2000) as aggregator:
+        for i in range(20):
+            aggregator.add(_alert(i), server.url())
+    assert aggregator.dispatcher.stats.sent > 1
+    assert all(len(r.body) <= 2000 for r in server.requests)
+    assert all(r.status == 200 for r in server.requests)
+
+
+def test_failures():
+    dispatcher = Mock()
+    with DigestAggregator(window=60, max_bytes=1000, dispatcher=dispatcher) as agg:
+        with pytest.raises(ValueError):
+            agg.add(b'{"title"', "http://a/")
+        big = ms.MessageCard(title="Big")
+        big.add_section(ms.CardSection(facts={"x": "y" * 1500}))
+        assert agg.add(big, "http://a/")
+        agg.flush()
+        assert agg.failed == 1
+
+        frozen = _alert(1)
+        frozen.set_sections([s.freeze() for s in frozen["sections"]])
+        lazy = ms.MessageCard.from_json(_alert(2).to_bytes(), lazy=True)
+        data = b'{"summary": "s", "sections": [{"markdown": true, "text": "t"}]}'
+        for card in (frozen, lazy, data):
+            assert agg.add(card, "http://b/")
+        agg.flush()
+        assert agg.pending == 0
+    assert agg.failed == 1
+    sections = [c[0][0]["sections"] for c in dispatcher.submit.call_args_list]
+    assert [s["facts"] for s in sections[0][:2]] == [
+        [ms.Fact("host", "db1")],
+        [ms.Fact("host", "db2")],
+    ]
+    assert sections[0][2]["text"] == "t"
+
+
+def test_refused():
+    dispatcher = Mock()
+    dispatcher.submit.return_value = False
+    with DigestAggregator(window=60, dispatcher=dispatcher) as aggregator:
+        aggregator.add(_alert(0), "http://a/")
+        aggregator.add(_alert(1), "http://a/")
+        aggregator.flush()
+        assert aggregator.failed == 2
+
+    with DigestAggregator(window=60) as aggregator:
+        aggregator.dispatcher.close()
+        aggregator.add(_alert(0), "http://127.0.0.1:1/")
+    assert aggregator.failed == 1
@@ -0,0 +1,77 @@
+import threading
+
+from mock import Mock
+
+import msteams as ms
+from msteams.dispatch import Dispatcher, HTTPError, TokenBucket, _retry_after
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=1, now=0)
+    assert bucket.take(now=0) == 0
+    assert bucket.take(now=0) == 0.5
+    assert bucket.take(now=0.5) == 0
+
+    bucket.block(until=10)
+    assert bucket.take(now=1) == 9
+    assert bucket.take(now=10) == 0.5
+    assert bucket.take(now=10.5) == 0
+
+
+def test_retry_after():
+    assert _retry_after(HTTPError("u", 429, "", {"Retry-After": "3"}, None)) == 3
+    assert _retry_after(HTTPError("u", 429, "", {}, None)) is None
+    date = "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert _retry_after(HTTPError("u", 429, "", {"Retry-After": date}, None)) == 0
+
+
+def test_dispatch(server):
+    card = ms.MessageCard(title="Title", summary="Summary")
+    results = []
+    with Dispatcher(rate=100, burst=1, backoff=0.01, callback=results.append) as d:
+        assert d.submit(card, server.url("/a"))
+        assert d.submit(card, server.url("/bad"))
+        assert d.submit(card, server.url("/throttle"))
+        assert d.submit(card, server.url("/flaky"))
+        assert d.join(timeout=5)
+        assert d.queue_depth == 0
+        assert d.stats == (0, 3, 1, 2, 0)
+        assert d.submit(b"{}", "ftp://x/")
+        assert d.join(timeout=5)
+        assert d.stats.failed == 2
+
+    assert sorted((r.url.rsplit("/", 1)[1], r.status) for r in results[:4]) == [
+        ("a", 200),
+        ("bad", 400),
+        ("flaky", 200),
+        ("throttle", 200),
+    ]
+    assert not d.submit(card, server.url())
+    assert d.stats.dropped == 1
+
+
+def test_dispatch_drops_when_full():
+    release = threading.Event()
+    connector = Mock()
+    connector.send.side_effect = lambda url, data: release.wait() and Mock(status=200)
+    d = Dispatcher(connector=connector, max_queue=2, workers=1)
+    assert d.submit(b"{}", "http://a/")
+    assert d.submit(b"{}", "http://a/")
+    assert not d.submit(b"{}", "http://a/")
+    assert d.stats.dropped == 1
+    assert d.queue_depth == 2
+    release.set()
+    d.close(timeout=5)
+    assert d.stats.queue_depth == 0
+
+
+def test_dispatch_callback_errors():
+    connector = Mock()
+    connector.send.return_value = Mock(status=200)
+    callback = Mock(side_effect=RuntimeError("callback"))
+    with Dispatcher(connector=connector, workers=1, callback=callback) as d:
+        assert d.submit(b"{}", "http://a/", callback=callback)
+        assert d.submit(b"{}", "http://a/")
+        assert d.join(timeout=5)
+        assert d.stats.sent == 2
+    assert callback.call_count == 3
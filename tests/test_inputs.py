@@ -3,7 +3,7 @@ from collections import OrderedDict
 
 import pytest
 
-from msteams import DateInput, MultipleChoiceInput, TextInput
+from msteams import DateInput, Field, Input, MultipleChoiceInput, TextInput
 
 EXPECTED_INPUT = OrderedDict(
     (
@@ -108,3 +108,17 @@ def test_multiple_choice_input():
 
     with pytest.raises(ValueError):
         mi = MultipleChoiceInput(style="invalid")
+
+
+def test_input_fields():
+    assert list(Input._fields) == ["id", "is_required", "title", "value"]
+    assert list(DateInput._fields)[-1] == "include_time"
+    assert "include_time" not in TextInput._fields
+    assert "choices" not in DateInput._fields
+
+    MultipleChoiceInput()
+    assert "choices" not in Input._fields
+    with pytest.raises(TypeError):
+        Input._fields["extra"] = Field(str, False)
+    with pytest.raises(ValueError):
+        DateInput(is_multiline=True)
@@ -1,9 +1,25 @@
+import copy
 import json
+import pickle
 from collections import OrderedDict
 
 import pytest
 
-from msteams import CardSection, HttpPostAction, MessageCard
+from msteams import (
+    ActionCard,
+    CardSection,
+    Choice,
+    DateInput,
+    Fact,
+    HttpPostAction,
+    ImageObject,
+    MessageCard,
+    MultipleChoiceInput,
+    OpenUriAction,
+    RawFragment,
+    TextInput,
+    lazy_validation,
+)
 
 EXP_TITLE = OrderedDict({"title": "Card Title"})
 EXP_SUMMARY = OrderedDict({"summary": "Card summary"})
@@ -109,3 +125,230 @@ def test_actions():
     card = MessageCard()
     card.set_potential_actions([a])
     assert card.json_payload == json.dumps(e)
+
+
+def _get_full_card():
+    section = CardSection(
+        title="Section title",
+        facts={"a": "b", "c": "d"},
+        hero_image=ImageObject("https://example.com/image.png", "Image"),
+    )
+    inputs = [
+        TextInput(id="comment", is_multiline=True),
+        DateInput(id="date", include_time=False),
+        MultipleChoiceInput(id="list", choices=[Choice("One", "1")], style="expanded"),
+    ]
+    action_card = ActionCard(
+        name="Comment",
+        inputs=inputs,
+        actions=[HttpPostAction("Send", "https://example.com/post", body="{}")],
+    )
+    return MessageCard(
+        title="Card Title",
+        theme_color="FF5500",
+        sections=[section],
+        potential_action=[
+            OpenUriAction("Open", {"default": "https://example.com"}),
+            action_card,
+        ],
+    )
+
+
+def test_from_payload():
+    card = _get_full_card()
+
+    parsed = MessageCard.from_payload(card.payload)
+    assert parsed == card
+    assert parsed.to_bytes() == card.to_bytes()
+    assert type(parsed["potential_action"][1]["inputs"][2]) is MultipleChoiceInput
+
+    parsed = MessageCard.from_json(card.to_bytes())
+    assert parsed == card
+    parsed = MessageCard.from_json(card.json_payload)
+    assert parsed == card
+
+    payload = card.payload
+    payload["correlationId"] = "abc"
+    payload["sections"][0]["markdown"] = True
+    parsed = MessageCard.from_payload(payload)
+    assert parsed != card
+    assert parsed.payload == payload
+    assert json.loads(parsed.to_bytes().decode()) == payload
+    assert parsed.estimate_size() == len(parsed.to_bytes())
+    parsed.set_title("New title")
+    assert json.loads(parsed.json_payload)["correlationId"] == "abc"
+    assert copy.copy(parsed).payload == parsed.payload
+    assert pickle.loads(pickle.dumps(parsed)) == parsed
+
+    payload = card.payload
+    payload["sections"][0]["facts"][0]["unknown"] = 1
+    with pytest.raises(ValueError) as e:
+        MessageCard.from_payload(payload)
+    assert str(e.value).startswith("sections[0].facts[0].unknown: ")
+
+    payload = card.payload
+    payload["potentialAction"][0]["@type"] = "TextInput"
+    with pytest.raises(ValueError):
+        MessageCard.from_payload(payload)
+
+    payload = card.payload
+    payload["sections"][0]["title"] = 1
+    with pytest.raises(TypeError) as e:
+        MessageCard.from_payload(payload)
+    assert str(e.value).startswith("sections[0].title: ")
+
+
+def test_from_payload_lazy():
+    card = _get_full_card()
+    data = card.to_bytes()
+
+    parsed = MessageCard.from_json(data, lazy=True)
+    assert parsed.to_bytes() == data
+    parsed.set_title("New title")
+    assert json.loads(parsed.to_bytes().decode())["title"] == "New title"
+
+    parsed["sections"][0].set_title("New section")
+    payload = json.loads(parsed.to_bytes().decode())
+    assert payload["sections"][0]["title"] == "New section"
+    assert payload["potentialAction"] == card.payload["potentialAction"]
+
+    parsed = MessageCard.from_json(data, lazy=True)
+    assert parsed.payload == card.payload
+    assert parsed == card
+
+    payload = card.payload
+    payload["sections"][0]["title"] = 1
+    parsed = MessageCard.from_payload(payload, lazy=True)
+    with pytest.raises(TypeError) as e:
+        parsed.validate()
+    assert str(e.value).startswith("sections")
+
+
+def test_freeze():
+    card = _get_full_card()
+    section = card["sections"][0]
+    actions = card["potential_action"]
+
+    frozen = [a.freeze() for a in actions]
+    assert all(type(f) is RawFragment for f in frozen)
+    assert frozen == actions
+    assert actions == frozen
+
+    frozen_card = MessageCard(
+        title="Card Title",
+        theme_color="FF5500",
+        sections=[section.freeze()],
+        potential_action=frozen,
+    )
+    assert frozen_card.to_bytes() == card.to_bytes()
+    assert frozen_card.payload == card.payload
+    frozen_card.validate()
+
+    frozen_card = MessageCard()
+    frozen_card.add_potential_action(frozen[1])
+    assert frozen_card.payload["potentialAction"] == [actions[1].payload]
+
+    with pytest.raises(TypeError):
+        MessageCard(sections=frozen)
+    with pytest.raises(TypeError):
+        CardSection(hero_image=section.freeze())
+
+    assert frozen[0].thaw() == actions[0]
+    assert frozen[0].to_bytes() == actions[0].to_bytes()
+    assert card.freeze().to_bytes() == card.to_bytes()
+
+
+def test_estimate_size():
+    card = _get_full_card()
+    # Decoded, to be unicode on python 2 as well
+    card["sections"][0].add_facts_from_columns([b"\xc3\xa5".decode("utf-8")], ["1"])
+    card.add_section(CardSection(text="Text", start_group=True, facts={"a": "b"}))
+    size = card.estimate_size()
+    assert size == len(card.to_bytes())
+    assert card.estimate_size() == size
+
+    card.set_title("Longer title")
+    assert card.estimate_size() == size + 2
+
+
+def test_split():
+    card = MessageCard(title="Report", text="Text")
+    card.add_potential_action(HttpPostAction("Ack", "https://example.com"))
+    for i in range(10):
+        card.add_section(CardSection(title="Section {}".format(i), text="x" * 100))
+    section = CardSection(title="Facts", text="Many facts")
+    section.set_facts_from_columns(
+        ["name {}".format(i) for i in range(100)],
+        [b"\xc3\xa5".decode("utf-8") * 10] * 100,
+    )
+    card.add_section(section)
+    section = CardSection(title="More facts")
+    section.set_facts([Fact("fact {}".format(i), "value") for i in range(50)])
+    card.add_section(section)
+
+    assert card.split(len(card.to_bytes())) == [card]
+
+    cards = card.split(1500)
+    assert len(cards) > 4
+    assert all(len(c.to_bytes()) <= 1500 for c in cards)
+    assert cards[0]["text"] == "Text"
+    assert cards[0]["potential_action"] == card["potential_action"]
+    assert all(c["title"] == "Report (continued)" for c in cards[1:])
+    assert all("text" not in c.payload for c in cards[1:])
+
+    sections = [s for c in cards for s in c["sections"]]
+    assert sections[:10] == card["sections"][:10]
+    facts = [f for s in sections for f in s.payload.get("facts", [])]
+    assert facts == card.payload["sections"][10]["facts"] + [
+        {"name": "fact {}".format(i), "value": "value"} for i in range(50)
+    ]
+    titles = [s["title"] for s in sections[10:]]
+    assert set(titles) == {"Facts", "More facts"}
+    assert [s.payload.get("text") for s in sections[10:]].count("Many facts") == 1
+
+    with pytest.raises(ValueError):
+        card.split(100)
+    with pytest.raises(ValueError):
+        MessageCard(sections=[CardSection(text="x" * 1000)]).split(500)
+
+    data = card.to_bytes()
+    cards[0].add_potential_action(HttpPostAction("Other", "https://example.com"))
+    cards[0]["sections"][0].set_title("Changed")
+    assert len(card["potential_action"]) == 1
+    assert card["sections"][0]["title"] == "Section 0"
+    assert card.to_bytes() == data
+
+    expected = [c.payload for c in card.split(1500)]
+    lazy = MessageCard.from_json(data, lazy=True)
+    assert [c.payload for c in lazy.split(1500)] == expected
+    frozen = MessageCard.from_json(data)
+    frozen.set_sections([s.freeze() for s in frozen["sections"]])
+    assert [c.payload for c in frozen.split(1500)] == expected
+
+
+def test_split_fills_cards():
+    card = MessageCard(title="Report", summary="Summary")
+    for i in range(5):
+        facts = [Fact("fact {}".format(j), "value {}".format(j)) for j in range(300)]
+        card.add_section(CardSection(title="Section {}".format(i), facts=facts))
+    card.add_section(CardSection(text="x" * 6000))
+
+    cards = card.split(10000)
+    # About 65 kB of facts in 7 cards, and the text section in its own
+    assert len(cards) == 8
+    assert all(len(c.to_bytes()) > 9900 for c in cards[:6])
+    assert cards[-1]["sections"] == [card["sections"][-1]]
+    facts = [
+        f
+        for c in cards
+        for s in c["sections"]
+        for f in s.get_payload().get("facts", [])
+    ]
+    assert facts == [f for s in card.payload["sections"] for f in s.get("facts", [])]
+
+
+def test_estimate_size_unconverted():
+    with lazy_validation():
+        section = CardSection(hero_image="http://x", facts={"a": "b"})
+    size = section.estimate_size()
+    assert size == len(section.to_bytes())
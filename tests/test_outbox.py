@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+import pytest
+
+import msteams as ms
+from msteams.dispatch import Dispatcher
+from msteams.outbox import Outbox, OutboxSender
+
+
+def _segments(directory):
+    return sorted(n for n in os.listdir(directory) if n.endswith(".seg"))
+
+
+def test_outbox(tmpdir):
+    directory = str(tmpdir)
+    card = ms.MessageCard(title="Title", summary="Summary")
+    url = b"http://b/\xc3\xa9".decode("utf-8")
+    with Outbox(directory, segment_size=200) as outbox:
+        ends = [outbox.append(card, "http://a/{}".format(i)) for i in range(5)]
+        ends.append(outbox.append(b"{}", url))
+        assert outbox.end == ends[-1]
+        records = list(outbox.records())
+        assert [r.end for r in records] == ends
+        assert records[0].offset == 0
+        assert records[0].data == card.to_bytes()
+        assert records[-1] == (ends[-2], ends[-1], url, b"{}")
+        assert len(_segments(directory)) == 5
+
+        outbox.commit(ends[2])
+        assert len(_segments(directory)) == 2
+        assert [r.connector_url for r in outbox.records()][0] == "http://a/3"
+
+    with Outbox(directory, segment_size=200) as outbox:
+        assert outbox.committed == ends[2]
+        assert [r.end for r in outbox.records()] == ends[3:]
+        assert list(outbox.records(ends[3]))[0].connector_url == "http://a/4"
+
+
+def test_outbox_recovery(tmpdir):
+    directory = str(tmpdir)
+    with Outbox(directory, sync=False) as outbox:
+        outbox.append(b"{}", "http://a/")
+        end = outbox.append(b"{}", "http://b/")
+    path = os.path.join(directory, _segments(directory)[-1])
+    with open(path, "r+b") as f:
+        f.truncate(end - 3)
+
+    with Outbox(directory) as outbox:
+        assert [r.connector_url for r in outbox.records()] == ["http://a/"]
+        assert outbox.append(b"{}", "http://c/") == end
+        assert [r.connector_url for r in outbox.records()] == ["http://a/", "http://c/"]
+
+    with open(path, "r+b") as f:
+        f.seek(20)
+        f.write(b"x")
+    with Outbox(directory) as outbox:
+        assert list(outbox.records()) == []
+        assert outbox.end == 0
+
+
+def test_outbox_concurrent_appends(tmpdir):
+    with Outbox(str(tmpdir)) as outbox:
+
+        def append(i):
+            for j in range(20):
+                outbox.append(b"{}", "http://a/{}/{}".format(i, j))
+
+        threads = [threading.Thread(target=append, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        urls = [r.connector_url for r in outbox.records()]
+        assert len(urls) == 80
+        assert [u for u in urls if u.startswith("http://a/1/")] == [
+            "http://a/1/{}".format(j) for j in range(20)
+        ]
+    with pytest.raises(ValueError):
+        outbox.append(b"{}", "http://a/")
+
+
+def test_outbox_sender(tmpdir, server):
+    directory = str(tmpdir)
+    card = ms.MessageCard(title="Title", summary="Summary")
+    with Outbox(directory) as outbox:
+        for i in range(3):
+            outbox.append(card, server.url("/{}".format(i)))
+        outbox.append(card, server.url("/bad"))
+        outbox.append(card, server.url("/flaky"))
+
+        dispatcher = Dispatcher(rate=100, burst=10, backoff=0.01)
+        with OutboxSender(outbox, dispatcher) as sender:
+            assert sender.join(timeout=5)
+            assert outbox.committed == outbox.end
+            outbox.append(card, server.url("/3"))
+            assert sender.join(timeout=5)
+        dispatcher.close()
+        assert dispatcher.stats == (0, 5, 1, 1, 0)
+
+        outbox.append(card, server.url("/4"))
+
+    paths = sorted(r.path for r in server.requests)
+    assert paths == ["/0", "/1", "/2", "/3", "/bad", "/flaky", "/flaky"]
+
+    with Outbox(directory) as outbox:
+        with OutboxSender(outbox) as sender:
+            assert sender.join(timeout=5)
+    assert server.requests[-1].path == "/4"
+    assert len(server.requests) == 8
+
+
+def test_outbox_sender_outage(tmpdir, server):
+    server.add_rule("/down", status=503, times=3)
+    card = ms.MessageCard(title="Title", summary="Summary")
+    with Outbox(str(tmpdir)) as outbox:
+        first = outbox.append(card, server.url("/0"))
+        outbox.append(card, server.url("/down"))
+        outbox.append(card, server.url("/bad"))
+        outbox.append(card, server.url("/1"))
+
+        dispatcher = Dispatcher(rate=100, burst=10, max_retries=0)
+        with OutboxSender(outbox, dispatcher, retry_delay=0.1) as sender:
+            time.sleep(0.15)
+            sender.commit()
+            assert outbox.committed == first
+            assert sender.join(timeout=5)
+            assert outbox.committed == outbox.end
+        dispatcher.close()
+
+    paths = [r.path for r in server.requests]
+    assert paths.count("/down") == 4
+    assert paths.count("/bad") == 1
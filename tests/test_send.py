@@ -3,26 +3,58 @@ import msteams as ms
 
 
 def test_send():
-    with patch("msteams.request.urlopen", autospec=True) as mock_urlopen:
+    with patch("msteams.transport.Connector.send", autospec=True) as mock_send:
 
         card = ms.MessageCard(title="Title", summary="Summary")
         card.send("https://test.com")
 
-        assert mock_urlopen.call_count == 1
-        args, kwargs = mock_urlopen.call_args
-        assert isinstance(args[0], ms.request.Request)
+        assert mock_send.call_count == 1
+        args, kwargs = mock_send.call_args
+        assert isinstance(args[0], ms.Connector)
+        assert args[1] == "https://test.com"
+        assert args[2] == card.json_payload.encode("utf-8")
 
 
 def test_send_proxy():
-    with patch("msteams.request.urlopen", autospec=True) as mock_urlopen:
+    with patch("msteams.transport.Connector.send", autospec=True) as mock_send:
         card = ms.MessageCard(title="Title", summary="Summary")
         card.send("https://test.com", proxy="proxy")
 
-        args, kwargs = mock_urlopen.call_args
-        assert isinstance(args[0], ms.request.Request)
+        args, kwargs = mock_send.call_args
+        assert args[0].proxy == {"https": "proxy"}
 
         card.send("https://test.com", proxy={"http": "proxy"})
 
-        assert mock_urlopen.call_count == 2
-        args, kwargs = mock_urlopen.call_args
-        assert isinstance(args[0], ms.request.Request)
+        assert mock_send.call_count == 2
+        args, kwargs = mock_send.call_args
+        assert args[0].proxy == {"http": "proxy"}
+
+
+def test_send_connector():
+    with patch("msteams.transport.Connector.send", autospec=True) as mock_send:
+        connector = ms.Connector()
+        card = ms.MessageCard(title="Title", summary="Summary")
+        card.send("https://test.com", connector=connector)
+
+        args, kwargs = mock_send.call_args
+        assert args[0] is connector
+
+
+def test_send_constructed(teams_server):
+    card = ms.MessageCard.construct(title="Title", summary="Summary")
+    card.add_section(
+        ms.CardSection.construct(facts={"a": "b"}, hero_image="http://x/a.png")
+    )
+    card.add_potential_action(ms.OpenUriAction.construct("Open", "http://x"))
+    expected = ms.MessageCard(
+        title="Title",
+        summary="Summary",
+        sections=[ms.CardSection(facts={"a": "b"}, hero_image="http://x/a.png")],
+        potential_action=[ms.OpenUriAction("Open", "http://x")],
+    )
+    assert card.to_bytes() == expected.to_bytes()
+    assert card.payload == expected.payload
+    assert card.estimate_size() == len(expected.to_bytes())
+
+    assert card.send(teams_server.url()).status == 200
+    assert teams_server.requests[0].body == expected.to_bytes()
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from mock import patch
+
+from msteams import CardSection, CardTemplate, Fact, HttpPostAction, MessageCard
+
+
+def _get_card(host, value, body):
+    card = MessageCard(title="{} is down".format(host), summary="Alert")
+    card.add_section(CardSection(facts=[Fact("Host", host), Fact("Value", value)]))
+    card.add_potential_action(HttpPostAction("Ack", "https://example.com", body=body))
+    return card
+
+
+def test_render():
+    template = CardTemplate(_get_card("{host}", "{value}", '{{"host": "{host}"}}'))
+    assert template.fields == ("host", "value")
+
+    card = _get_card("db1", "10", '{"host": "db1"}')
+    assert template.render(host="db1", value="10") == card.json_payload
+    assert template.render_bytes(host="db1", value=10) == card.to_bytes()
+
+    host = '"\u00e5\\'
+    card = _get_card(host, "1.5", '{"host": "' + host + '"}')
+    assert template.render(host=host, value=1.5) == card.json_payload
+
+    with pytest.raises(KeyError):
+        template.render(host="db1")
+
+
+def test_format_spec():
+    template = CardTemplate(MessageCard(title="{value:.2f} {value!r}"))
+    payload = json.loads(template.render(value=0.5))
+    assert payload["title"] == "0.50 0.5"
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        CardTemplate(MessageCard(title="{}"))
+    with pytest.raises(ValueError):
+        CardTemplate(MessageCard(title="{a.b}"))
+    with pytest.raises(ValueError):
+        CardTemplate(MessageCard(title="{a"))
+
+
+def test_send():
+    template = CardTemplate(MessageCard(title="{title}"))
+    with patch("msteams.transport.Connector.send", autospec=True) as mock_send:
+        template.send("https://test.com", {"title": "Title"})
+    args, _ = mock_send.call_args
+    assert args[1] == "https://test.com"
+    assert args[2] == MessageCard(title="Title").to_bytes()
@@ -0,0 +1,71 @@
+import pytest
+
+import msteams as ms
+from msteams.testing import FakeTeamsServer, main
+from msteams.transport import HTTPError, URLError
+
+
+def test_teams_server(teams_server):
+    card = ms.MessageCard(title="Title")
+    with ms.Connector() as connector:
+        assert card.send(teams_server.url(), connector=connector).status == 200
+        with pytest.raises(HTTPError) as e:
+            connector.send(teams_server.url(), b'{"title": 1}')
+        assert e.value.code == 400
+        assert e.value.read().startswith(b"Invalid card: title: ")
+        data = (
+            b'{"summary": "s", "correlationId": "1", "sections": [{"markdown": true}]}'
+        )
+        assert connector.send(teams_server.url(), data).status == 200
+
+    request = teams_server.requests[0]
+    assert request.path == "/webhook"
+    assert request.body == card.to_bytes()
+    assert request.status == 200
+    assert request.duration >= 0
+    assert len(teams_server.timings) == 3
+    assert teams_server.stats()["status"] == {"200": 2, "400": 1}
+
+
+def test_faults():
+    data = ms.MessageCard().to_bytes()
+    with FakeTeamsServer(throttle_rate=1, retry_after=7) as server:
+        with pytest.raises(HTTPError) as e:
+            ms.Connector().send(server.url(), data)
+    assert e.value.code == 429
+    assert e.value.headers["Retry-After"] == "7"
+
+    with FakeTeamsServer(error_rate=1) as server:
+        with pytest.raises(HTTPError) as e:
+            ms.Connector().send(server.url(), data)
+    assert e.value.code == 503
+
+    with FakeTeamsServer(reset_rate=1) as server:
+        with pytest.raises(URLError):
+            ms.Connector().send(server.url(), data)
+    assert server.requests[0].status is None
+    assert server.stats()["status"] == {"reset": 1}
+
+    with FakeTeamsServer(latency=0.1) as server:
+        ms.Connector().send(server.url(), data)
+    assert server.timings[0] >= 0.1
+
+
+def test_rules():
+    data = ms.MessageCard().to_bytes()
+    with FakeTeamsServer(error_rate=1) as server, ms.Connector() as connector:
+        server.add_rule("/ok", status=200)
+        server.add_rule("/once", status=500, times=1)
+        assert connector.send(server.url("/ok"), data).status == 200
+        with pytest.raises(HTTPError):
+            connector.send(server.url("/once"), data)
+        with pytest.raises(HTTPError) as e:
+            connector.send(server.url("/once"), data)
+    assert e.value.code == 503
+    assert [r.status for r in server.requests] == [200, 500, 503]
+
+
+def test_main(capsys):
+    with pytest.raises(SystemExit):
+        main(["--help"])
+    assert "--throttle-rate" in capsys.readouterr().out
@@ -0,0 +1,89 @@
+import base64
+
+import pytest
+
+import msteams as ms
+from msteams.transport import (
+    Connector,
+    HTTPError,
+    URLError,
+    default_connector,
+    send_many,
+)
+
+
+def test_send_reuses_connection(server):
+    with Connector() as connector:
+        for i in range(3):
+            resp = connector.send(server.url("/hook?i={}".format(i)), b"{}")
+            assert resp.getcode() == 200
+            assert resp.read() == b"1"
+
+    paths = [r[0] for r in server.requests]
+    assert paths == ["/hook?i=0", "/hook?i=1", "/hook?i=2"]
+    assert len(set(r[1] for r in server.requests)) == 1
+    assert all(r[2] == b"{}" for r in server.requests)
+
+
+def test_send_stale_connection(server):
+    with Connector() as connector:
+        connector.send(server.url("/drop"), b"{}")
+        assert connector.send(server.url(), b"{}").status == 200
+    assert len(server.requests) == 2
+
+
+def test_send_errors(server):
+    connector = Connector()
+    with pytest.raises(HTTPError) as e:
+        connector.send(server.url("/bad"), b"{}")
+    assert e.value.code == 400
+
+    with pytest.raises(ValueError):
+        connector.send("ftp://127.0.0.1/", b"{}")
+
+    port = server.server_port
+    server.shutdown()
+    server.server_close()
+    connector.close()
+    with pytest.raises(URLError):
+        connector.send("http://127.0.0.1:{}/".format(port), b"{}")
+
+
+def test_send_http_proxy(server):
+    host, port = server.server_address[:2]
+    proxy = "http://user:p%40ss@{}:{}".format(host, port)
+    with Connector(proxy={"http": proxy}) as connector:
+        connector.send("http://teams.invalid/hook", b"{}")
+        connector.send("http://teams.invalid/hook", b"{}", headers={"X-Id": "1"})
+
+    assert [r.path for r in server.requests] == ["http://teams.invalid/hook"] * 2
+    auth = "Basic " + base64.b64encode(b"user:p@ss").decode("ascii")
+    assert all(r.headers["Proxy-Authorization"] == auth for r in server.requests)
+    assert server.requests[1].headers["X-Id"] == "1"
+    assert "Proxy-Authorization" not in connector.headers
+
+
+def test_default_connector():
+    assert default_connector() is default_connector()
+    assert default_connector("proxy") is default_connector("proxy")
+    assert default_connector({"http": "a"}) is default_connector({"http": "a"})
+    assert default_connector("proxy") is not default_connector()
+
+
+def test_send_many(server):
+    card = ms.MessageCard(title="Title", summary="Summary")
+    urls = [server.url("/a"), server.url("/bad"), server.url("/c"), "ftp://x/"]
+
+    results = send_many(card, urls, max_workers=2)
+
+    assert [r.url for r in results] == urls
+    assert [r.status for r in results] == [200, 400, 200, None]
+    assert [r.ok for r in results] == [True, False, True, False]
+    assert isinstance(results[1].error, HTTPError)
+    assert isinstance(results[3].error, ValueError)
+    assert all(r.latency >= 0 for r in results)
+    assert sorted(r[0] for r in server.requests) == ["/a", "/bad", "/c"]
+    payload = card.json_payload.encode("utf-8")
+    assert all(r[2] == payload for r in server.requests)
+
+    assert send_many(b"{}", []) == []
@@ -0,0 +1,64 @@
+import json
+
+import msteams as ms
+from msteams.workers import ProcessDispatcher, _shard
+
+
+def test_shard():
+    assert _shard("http://a/", 4) == _shard("http://a/", 4)
+    assert set(_shard("http://a/{}".format(i), 4) for i in range(100)) == set(range(4))
+
+
+def test_process_dispatch(server):
+    paths = ["/a", "/b", "/flaky", "/throttle"]
+    results = []
+    with ProcessDispatcher(
+        processes=2,
+        threads=2,
+        rate=1000,
+        burst=10,
+        backoff=0.01,
+        callback=results.append,
+    ) as d:
+        for i in range(10):
+            for path in paths:
+                card = ms.MessageCard(title=str(i), summary="Summary")
+                assert d.submit(card, server.url(path))
+        assert d.submit(b"{}", server.url("/bad"))
+        assert d.join(timeout=10)
+        assert d.stats == (0, 40, 1, 2, 0)
+
+    assert not d.submit(b"{}", server.url("/a"))
+    assert d.stats.dropped == 1
+    assert len(results) == 41
+    assert [r for r in results if r.error is not None][0].error.code == 400
+
+    for path in paths:
+        titles = [
+            json.loads(r.body.decode("utf-8"))["title"]
+            for r in server.requests
+            if r.path == path and r.status == 200
+        ]
+        assert titles == [str(i) for i in range(10)]
+
+
+def test_process_dispatch_callback_errors(server):
+    def callback(result):
+        raise RuntimeError("callback")
+
+    with ProcessDispatcher(processes=1, rate=1000, callback=callback) as d:
+        for _ in range(3):
+            assert d.submit(b"{}", server.url())
+        assert d.join(timeout=5)
+        assert d.stats.sent == 3
+
+
+def test_process_dispatch_backpressure(server):
+    server.add_rule("/blocked", latency=0.2)
+    with ProcessDispatcher(processes=1, threads=1, rate=1000, max_queue=3) as d:
+        accepted = [d.submit(b"{}", server.url("/blocked")) for _ in range(10)]
+        assert accepted == [True] * 3 + [False] * 7
+        assert d.queue_depth == 3
+        assert d.join(timeout=5)
+        assert d.submit(b"{}", server.url("/blocked"))
+    assert d.stats == (0, 4, 0, 0, 7)